@@ -17,9 +17,12 @@
 
 import collections
 import enum
-import html
 import itertools
+import json
 import re
+from . import markup
+
+__version__ = "0.0.0"
 
 FILE_KEYS = {"grid", "subs", "clues", "title", "author", "copyright"}
 CELL_KEYS = {"text", "style"}
@@ -59,7 +62,10 @@ def load(pod):
         if not isinstance(clue, list):
             clue = [clue]
         for i, text in enumerate(clue):
-            clues[answer, i].text = _replace_variables(text, variables)
+            label = answer if len(clue) == 1 else "%s[%d]" % (answer, i)
+            rich = _resolve_variables(text, variables, label)
+            clues[answer, i].rich = rich
+            clues[answer, i].text = markup.to_html(rich)
 
     return Crossword(
         grid=grid,
@@ -70,8 +76,30 @@ def load(pod):
 
 
 def _load_grid(grid, subs):
-    lines = grid.splitlines()
-    grid = []
+    pattern, cells = _tokenizer(subs)
+    result = []
+    for line in grid.splitlines():
+        row = []
+        for token in pattern.findall(line):
+            kwargs = cells.get(token)
+            if kwargs is None:
+                kwargs = cells[token] = {"text": token}
+            row.append(Cell(**kwargs))
+        result.append(row)
+    return result
+
+
+_TOKENIZERS = {}
+
+
+def _tokenizer(subs):
+    # Returns a pattern that splits a line of grid into cell tokens (longest substitution first;
+    # otherwise single characters) and a map from token to Cell arguments. Both are cached by the
+    # content of `subs`, since a batch of puzzles tends to share a handful of tables.
+    key = json.dumps(subs, sort_keys=True, default=repr)
+    tokenizer = _TOKENIZERS.get(key)
+    if tokenizer is not None:
+        return tokenizer
 
     replace = DEFAULT_REPLACEMENTS.copy()
     replace.update(subs)
@@ -79,55 +107,75 @@ def _load_grid(grid, subs):
     matches.sort(key=lambda x: -len(x))
     matches.append(".")
 
-    pattern = re.compile("|".join(matches))
-    for line in lines:
-        grid.append([])
-        pos = 0
-        while pos < len(line):
-            m = pattern.match(line, pos=pos)
-            pos = m.end()
-            m = m.group(0)
-            if m in replace:
-                m = replace[m]
-            if isinstance(m, list):
-                m = {"text": m[0], "options": m}
-            if not isinstance(m, dict):
-                m = {"text": m}
-            grid[-1].append(Cell(**m))
-
-    return grid
+    cells = {}
+    for k, v in replace.items():
+        if isinstance(v, list):
+            v = {"text": v[0], "options": v}
+        if not isinstance(v, dict):
+            v = {"text": v}
+        cells[k] = dict(v)
+
+    if len(_TOKENIZERS) >= 64:
+        _TOKENIZERS.clear()
+    tokenizer = _TOKENIZERS[key] = (re.compile("|".join(matches)), cells)
+    return tokenizer
 
 
 def _find_answers(grid):
+    # Entries are found in one pass over rows and one over columns, and each answer is joined once
+    # from a slice. Every cell in an entry is pointed back at it (Cell.across and Cell.down).
     height = len(grid)
     width = len(grid[0])
+    rows = [[cell.text for cell in line] for line in grid]
+    columns = [list(column) for column in zip(*rows)]
+
+    across_end = [[0] * width for _ in range(height)]
+    down_end = [[0] * width for _ in range(height)]
+    for y, row in enumerate(rows):
+        for start, end in _runs(row):
+            across_end[y][start] = end
+    for x, column in enumerate(columns):
+        for start, end in _runs(column):
+            down_end[start][x] = end
 
     answers = []
     n = 0
     for y in range(height):
         for x in range(width):
-            cell = grid[y][x]
-            if cell.text is None:
-                continue
-            has_down = has_across = False
-            if (y == 0) or (grid[y - 1][x].text is None):
-                if (y < (height - 1)) and (grid[y + 1][x].text is not None):
-                    has_down = True
-            if (x == 0) or (grid[y][x - 1].text is None):
-                if (x < (width - 1)) and (grid[y][x + 1].text is not None):
-                    has_across = True
-            if not (has_down or has_across):
+            a = across_end[y][x]
+            d = down_end[y][x]
+            if not (a or d):
                 continue
 
             n += 1
-            if has_across:
-                answers.append(Clue(x, y, n, Dir.ACROSS, _across_word(grid, x, y)))
-            if has_down:
-                answers.append(Clue(x, y, n, Dir.DOWN, _down_word(grid, x, y)))
+            if a:
+                clue = Clue(x, y, n, Dir.ACROSS, "".join(rows[y][x:a]))
+                answers.append(clue)
+                for cell in grid[y][x:a]:
+                    cell.across = clue
+            if d:
+                clue = Clue(x, y, n, Dir.DOWN, "".join(columns[x][y:d]))
+                answers.append(clue)
+                for line in grid[y:d]:
+                    line[x].down = clue
 
     return answers
 
 
+def _runs(texts):
+    # Yields (start, end) for each run of two or more non-None texts.
+    start = None
+    for i, text in enumerate(texts):
+        if text is None:
+            if (start is not None) and (i - start) > 1:
+                yield start, i
+            start = None
+        elif start is None:
+            start = i
+    if (start is not None) and (len(texts) - start) > 1:
+        yield start, len(texts)
+
+
 def _map_variables(answers):
     variables = {}
     for answer, clues in itertools.groupby(
@@ -141,51 +189,21 @@ def _map_variables(answers):
     return variables
 
 
-def _replace_variables(text, variables):
-    pattern = re.compile(
-        r"""
-          \$
-          ( [A-Za-z0-9._/+-]+ (?:\[[0-9]+\])?
-          | \{ (.*?) \}
-          | \$
-          )
-        | \*
-          ( [^\s\\]
-            (?: (?:[^\\]|\\.)*?
-                [^\s\\]
-            )?
-          )
-          \*
-        | \\(.)
-        | (.[^*$\\]*)
-        """, re.X)
-    return pattern.sub(lambda m: _replacement_for(m, variables), text)
-
-
-def _replacement_for(m, variables):
-    if m.group(1) is not None:
-        if m.group(1) == "$":
-            return "$"
-        elif m.group(2) is not None:
-            if "&" in m.group(2):
-                conjunction = "and"
-                parts = [variables[x.strip()] for x in m.group(2).split("&")]
-            elif "|" in m.group(2):
-                conjunction = "or"
-                parts = [variables[x.strip()] for x in m.group(2).split("|")]
-            else:
-                conjunction = None
-                parts = variables[m.group(2).strip()]
-            return _name_clues(parts, conjunction=conjunction)
-        else:
-            clue = variables[m.group(1)]
-            return _name_clues(clue)
-    elif m.group(3) is not None:
-        return "<i>%s</i>" % _replace_variables(m.group(3), variables)
-    elif m.group(4) is not None:
-        return html.escape(m.group(4))
-    else:
-        return html.escape(m.group(5))
+def _resolve_variables(text, variables, label=None):
+    def name_ref(ref):
+        try:
+            parts = [variables[name] for name in ref.names]
+        except KeyError as e:
+            raise UnknownReferenceError(label, e.args[0])
+        if ref.conjunction is None:
+            return _name_clues(parts[0])
+        return _name_clues(parts, conjunction=ref.conjunction)
+
+    return markup.resolve(markup.parse(text), name_ref)
+
+
+def _replace_variables(text, variables, label=None):
+    return markup.to_html(_resolve_variables(text, variables, label))
 
 
 def _name_clues(clues, conjunction=None):
@@ -211,26 +229,9 @@ def _name_clues(clues, conjunction=None):
                                         for c in clues), conjunction, _name_clues(last))
 
 
-def _across_word(grid, x, y):
-    line = grid[y]
-    word = ""
-    for x in range(x, len(line)):
-        if line[x].text is None:
-            break
-        word += line[x].text
-    return word
-
-
-def _down_word(grid, x, y):
-    word = ""
-    for y in range(y, len(grid)):
-        if grid[y][x].text is None:
-            break
-        word += grid[y][x].text
-    return word
-
-
 class Crossword(object):
+    __slots__ = ("grid", "clues", "title", "author", "copyright", "width", "height")
+
     def __init__(self, grid, clues, title=None, author=None, copyright=None):
         self.grid = grid
         self.clues = clues
@@ -243,14 +244,30 @@ class Crossword(object):
         assert all((len(line) == self.width) for line in grid)
 
 
+# A large grid holds one of these per square, so they carry no __dict__. `style` is shared between
+# cells that come from the same substitution and must not be modified in place.
 class Cell(object):
-    def __init__(self, text=None, options=None, style=[], block=False, empty=False, number=None):
+    __slots__ = ("text", "options", "style", "block", "empty", "number", "across", "down")
+
+    def __init__(self, text=None, options=None, style=(), block=False, empty=False, number=None):
         self.text = text
         self.options = options
         self.style = style
         self.block = block
         self.empty = empty
         self.number = number
+        self.across = None  # The across Clue through this cell, if any.
+        self.down = None  # The down Clue through this cell, if any.
+
+    # Pickled as a plain tuple; the default for __slots__ classes, a dict of slots, is much slower
+    # to load.
+    def __getstate__(self):
+        return (self.text, self.options, self.style, self.block, self.empty, self.number,
+                self.across, self.down)
+
+    def __setstate__(self, state):
+        (self.text, self.options, self.style, self.block, self.empty, self.number, self.across,
+         self.down) = state
 
 
 class Dir(enum.Enum):
@@ -259,10 +276,25 @@ class Dir(enum.Enum):
 
 
 class Clue(object):
+    __slots__ = ("x", "y", "number", "direction", "text", "rich", "answer")
+
     def __init__(self, x, y, number, direction, answer):
         self.x = x
         self.y = y
         self.number = number
         self.direction = direction
-        self.text = None
+        self.text = None  # HTML
+        self.rich = None  # The same text as resolved acrux.markup nodes.
         self.answer = answer
+
+
+class UnknownReferenceError(KeyError):
+    def __init__(self, clue, name):
+        super(UnknownReferenceError, self).__init__(clue, name)
+        self.clue = clue
+        self.name = name
+
+    def __str__(self):
+        if self.clue is None:
+            return "reference to unknown entry $%s" % self.name
+        return "clue for %s refers to unknown entry $%s" % (self.clue, self.name)
@@ -16,11 +16,9 @@
 # limitations under the License.
 
 import acrux
-import argparse
+import acrux.bin.batch
 import collections
 import json
-import procyon
-import sys
 
 _IPUZ_HEADER = """
 , "title": %s
@@ -31,7 +29,10 @@ _IPUZ_HEADER = """
 
 
 def ax2ipuz(pod):
-    ax = acrux.load(pod)
+    return to_ipuz(acrux.load(pod))
+
+
+def to_ipuz(ax):
     ipuz = {
         "version": "http://ipuz.org/v1",
         "kind": ["http://ipuz.org/crossword#1"],
@@ -82,85 +83,70 @@ def ax2ipuz(pod):
 
 
 def dump_ipuz(x, f, indent):
-    f.write('{ "version": %s\n' % (json.dumps(x["version"], ensure_ascii=False)))
-    f.write(', "kind": %s\n' % (json.dumps(x["kind"], ensure_ascii=False)))
+    f.write(dumps_ipuz(x, indent))
+
+
+def dumps_ipuz(x, indent):
+    parts = []
+    parts.append('{ "version": %s\n' % (json.dumps(x["version"], ensure_ascii=False)))
+    parts.append(', "kind": %s\n' % (json.dumps(x["kind"], ensure_ascii=False)))
     for k in ["title", "author", "copyright"]:
         if k in x:
-            f.write(', "%s": %s\n' % (k, json.dumps(x[k], ensure_ascii=False)))
-    f.write(', "dimensions": %s\n' % (json.dumps(x["dimensions"], ensure_ascii=False)))
+            parts.append(', "%s": %s\n' % (k, json.dumps(x[k], ensure_ascii=False)))
+    parts.append(', "dimensions": %s\n' % (json.dumps(x["dimensions"], ensure_ascii=False)))
 
     for k in ["puzzle", "solution"]:
-        f.write(', "%s":\n' % k)
+        parts.append(', "%s":\n' % k)
+        rows, width = _encode_grid(x[k])
         line_prefix = "  [ "
-        for row in aligned(x[k]):
-            f.write(line_prefix)
+        for row in rows:
+            # Every cell is padded out to the widest one, after its comma.
+            parts.append(line_prefix)
             line_prefix = "  , "
-            cell_prefix = "["
-            for cell, padding in row:
-                f.write(cell_prefix)
-                cell_prefix = ", " + (" " * padding)
-                f.write(cell)
-            f.write(" " * padding)
-            f.write("]\n")
-        f.write("  ]\n")
-
-    f.write(', "clues":\n')
-    f.write('  { "Across":\n')
-    clue_prefix = "    [ "
-    for clue in x["clues"]["Across"]:
-        f.write(clue_prefix)
-        clue_prefix = "    , "
-        json.dump(clue, f, ensure_ascii=False)
-        f.write("\n")
-    f.write("    ]\n")
-    f.write('  , "Down":\n')
-    clue_prefix = "    [ "
-    for clue in x["clues"]["Down"]:
-        f.write(clue_prefix)
-        clue_prefix = "    , "
-        json.dump(clue, f, ensure_ascii=False)
-        f.write("\n")
-    f.write("    ]\n")
-    f.write("  }\n")
-    f.write("}\n")
-
-
-def aligned(grid):
-    grid = [[json.dumps(cell, ensure_ascii=False) for cell in row] for row in grid]
-
-    result = []
-    max_width = max(max(len(cell) for cell in row) for row in grid)
+            parts.append("[")
+            parts.extend((cell + ",").ljust(width + 2) for cell in row[:-1])
+            parts.append(row[-1].ljust(width))
+            parts.append("]\n")
+        parts.append("  ]\n")
+
+    parts.append(', "clues":\n')
+    for i, direction in enumerate(["Across", "Down"]):
+        parts.append('  %s "%s":\n' % ("{" if i == 0 else ",", direction))
+        clue_prefix = "    [ "
+        for clue in x["clues"][direction]:
+            parts.append(clue_prefix)
+            clue_prefix = "    , "
+            parts.append(json.dumps(clue, ensure_ascii=False))
+            parts.append("\n")
+        parts.append("    ]\n")
+    parts.append("  }\n")
+    parts.append("}\n")
+    return "".join(parts)
+
+
+def _encode_grid(grid):
+    # Returns the JSON for each cell, and the width of the widest. Most cells repeat a value seen
+    # earlier ("#", 0, a letter), so those are encoded once.
+    encoded = {}
+    rows = []
+    width = 0
     for row in grid:
-        result.append([])
-        for i, cell in enumerate(row):
-            result[-1].append((cell, max_width - len(cell)))
-    return result
+        rows.append([])
+        for cell in row:
+            if isinstance(cell, dict):
+                s = json.dumps(cell, ensure_ascii=False)
+            else:
+                s = encoded.get((type(cell), cell))
+                if s is None:
+                    s = encoded[type(cell), cell] = json.dumps(cell, ensure_ascii=False)
+            if len(s) > width:
+                width = len(s)
+            rows[-1].append(s)
+    return rows, width
 
 
 def main(args=None):
-    args = args or sys.argv[:]
-    parser = argparse.ArgumentParser(prog=args.pop(0))
-    parser.add_argument("input", metavar="IN.ax", nargs="?", type=argparse.FileType("r"))
-    parser.add_argument("output", metavar="OUT.ipuz", nargs="?", type=argparse.FileType("w"))
-    opts = parser.parse_args(args)
-
-    if opts.input is None:
-        opts.input = sys.stdin
-        input_name = "-"
-    else:
-        input_name = opts.input.name
-
-    if opts.output is None:
-        opts.output = sys.stdout
-
-    try:
-        pod = procyon.load(opts.input)
-    except procyon.ProcyonDecodeError as e:
-        print("%s:%s" % (input_name, e))
-        sys.exit(1)
-
-    ipuz = ax2ipuz(pod)
-    dump_ipuz(ipuz, opts.output, indent=2)
+    acrux.bin.batch.main("ipuz", args)
 
 
 if __name__ == "__main__":
@@ -16,11 +16,10 @@
 # limitations under the License.
 
 import acrux
-import acrux.text
-import argparse
+import acrux.bin.batch
+import acrux.markup
+import collections
 import io
-import procyon
-import sys
 from reportlab import platypus
 from reportlab.lib import colors, pagesizes, styles, units
 from reportlab.platypus import flowables
@@ -31,96 +30,129 @@ circle_line = colors.Color(0.2, 0.2, 0.2)
 
 
 def ax2pdf(pod):
-    ax = acrux.load(pod)
-    pdf = io.BytesIO()
-    doc = platypus.SimpleDocTemplate(
-        pdf,
-        pagesize=pagesizes.landscape(pagesizes.A4),
-        topMargin=10 * units.mm,
-        leftMargin=10 * units.mm,
-        rightMargin=10 * units.mm,
-        bottomMargin=10 * units.mm)
-
-    sample_style_sheet = styles.getSampleStyleSheet()
-    title_style = sample_style_sheet["Title"]
-    heading1_style = sample_style_sheet["Heading1"]
-    body_style = sample_style_sheet["BodyText"]
-    title_style.alignment = 0
-    title_style.fontSize = 18
-    title_style.leading = 36
-    heading1_style.fontSize = 14
-    heading1_style.leading = 16
-    body_style.fontSize = 13
-    body_style.leading = 15
-    clue_number_style = body_style.clone("ClueNumber")
-    clue_number_style.alignment = 2
-    caption_style = body_style.clone("ClueNumber")
-    caption_style.fontSize = 10
-
-    title = [platypus.Paragraph(ax.title, title_style)]
-
-    grid_column = []
-    grid = CrosswordGrid(ax)
-    grid_column.append(grid)
-    grid_column.append(
-        platypus.Paragraph("<a href=\"https://twotaled.com/cross/\">twotaled.com/cross/</a>",
-                           caption_style))
-
-    across_cells = []
-    down_cells = []
-    for clue in sorted(ax.clues.values(), key=lambda clue: clue.number):
-        if clue.direction == acrux.Dir.ACROSS:
-            cells = across_cells
-        else:
-            cells = down_cells
-        cells.append([
-            platypus.Paragraph("%d." % clue.number, clue_number_style),
-            platypus.Paragraph(acrux.text.to_latin1(clue.text), body_style),
+    return to_pdf(acrux.load(pod))
+
+
+def to_pdf(ax):
+    return renderer().render(ax)
+
+
+_renderer = None
+
+
+def renderer():
+    # A shared Renderer for callers that don't need their own.
+    global _renderer
+    if _renderer is None:
+        _renderer = Renderer()
+    return _renderer
+
+
+class Renderer(object):
+    # Styles are built once, as copies; reportlab's sample stylesheet is never modified. After
+    # __init__, nothing here changes, so one Renderer can be shared between threads.
+    def __init__(self, pagesize=pagesizes.landscape(pagesizes.A4)):
+        self.pagesize = pagesize
+
+        sample_style_sheet = styles.getSampleStyleSheet()
+        self.title_style = sample_style_sheet["Title"].clone(
+            "Title", alignment=0, fontSize=18, leading=36)
+        self.heading1_style = sample_style_sheet["Heading1"].clone(
+            "Heading1", fontSize=14, leading=16)
+        self.body_style = sample_style_sheet["BodyText"].clone(
+            "BodyText", fontSize=13, leading=15)
+        self.clue_number_style = self.body_style.clone("ClueNumber", alignment=2)
+        self.caption_style = self.body_style.clone("Caption", fontSize=10)
+
+        self.clue_style = platypus.TableStyle([
+            ("ALIGN", (0, 0), (0, -1), "RIGHT"),
+            ("ALIGN", (1, 0), (1, -1), "LEFT"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 0.5 * units.mm),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 0.5 * units.mm),
+            ("TOPPADDING", (0, 0), (-1, -1), 0),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 2 * units.mm),
+        ])
+        self.page_style = platypus.TableStyle([
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 0),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+            ("TOPPADDING", (0, 0), (-1, -1), 0),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+            ("SPAN", (0, 0), (-1, 0)),
         ])
 
-    clue_style = platypus.TableStyle([
-        ("ALIGN", (0, 0), (0, -1), "RIGHT"),
-        ("ALIGN", (1, 0), (1, -1), "LEFT"),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 0.5 * units.mm),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 0.5 * units.mm),
-        ("TOPPADDING", (0, 0), (-1, -1), 0),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2 * units.mm),
-    ])
-    across_column = []
-    across_column.append(platypus.Paragraph("Across", heading1_style))
-    across_column.append(
-        platypus.Table(across_cells, colWidths=[8.5 * units.mm, None], style=clue_style))
-    down_column = []
-    down_column.append(platypus.Paragraph("Down", heading1_style))
-    down_column.append(
-        platypus.Table(down_cells, colWidths=[8.5 * units.mm, None], style=clue_style))
-
-    flows = [
-        platypus.Table(
-            [[title, "", ""], [across_column, down_column, grid_column]],
-            colWidths=[None, None, grid.width + 5 * units.mm],
-            style=platypus.TableStyle([
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 0),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-                ("TOPPADDING", (0, 0), (-1, -1), 0),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-                ("SPAN", (0, 0), (-1, 0)),
-            ]))
-    ]
-
-    doc.build(flows, onFirstPage=on_first_page(ax))
-    data = pdf.getvalue()
-    pdf.close()
-    return data
-
-
-def on_first_page(ax):
+    def render(self, ax):
+        return self._build(self.flowables(ax), ax.title, ax.author)
+
+    def render_booklet(self, axes, title=None, author=None):
+        # All puzzles in one PDF, a page each.
+        flows = []
+        for ax in axes:
+            if flows:
+                flows.append(platypus.PageBreak())
+            flows.extend(self.flowables(ax))
+        return self._build(flows, title, author)
+
+    def flowables(self, ax):
+        title = [platypus.Paragraph(ax.title, self.title_style)]
+
+        grid_column = []
+        grid = CrosswordGrid(ax)
+        grid_column.append(grid)
+        grid_column.append(
+            platypus.Paragraph("<a href=\"https://twotaled.com/cross/\">twotaled.com/cross/</a>",
+                               self.caption_style))
+
+        across_cells = []
+        down_cells = []
+        for clue in sorted(ax.clues.values(), key=lambda clue: clue.number):
+            if clue.direction == acrux.Dir.ACROSS:
+                cells = across_cells
+            else:
+                cells = down_cells
+            cells.append([
+                platypus.Paragraph("%d." % clue.number, self.clue_number_style),
+                platypus.Paragraph(acrux.markup.to_reportlab(clue.rich), self.body_style),
+            ])
+
+        across_column = []
+        across_column.append(platypus.Paragraph("Across", self.heading1_style))
+        across_column.append(
+            platypus.Table(across_cells, colWidths=[8.5 * units.mm, None], style=self.clue_style))
+        down_column = []
+        down_column.append(platypus.Paragraph("Down", self.heading1_style))
+        down_column.append(
+            platypus.Table(down_cells, colWidths=[8.5 * units.mm, None], style=self.clue_style))
+
+        return [
+            platypus.Table(
+                [[title, "", ""], [across_column, down_column, grid_column]],
+                colWidths=[None, None, grid.width + 5 * units.mm],
+                style=self.page_style)
+        ]
+
+    def _build(self, flows, title, author):
+        # A document template holds the state of one build, so each PDF gets its own.
+        pdf = io.BytesIO()
+        doc = platypus.SimpleDocTemplate(
+            pdf,
+            pagesize=self.pagesize,
+            topMargin=10 * units.mm,
+            leftMargin=10 * units.mm,
+            rightMargin=10 * units.mm,
+            bottomMargin=10 * units.mm)
+        doc.build(flows, onFirstPage=on_first_page(title, author))
+        data = pdf.getvalue()
+        pdf.close()
+        return data
+
+
+def on_first_page(title, author):
     def fn(canvas, doc):
-        canvas.setTitle(ax.title)
-        canvas.setAuthor(ax.author)
+        canvas.setTitle(title)
+        canvas.setAuthor(author)
 
     return fn
 
@@ -145,50 +177,76 @@ class CrosswordGrid(flowables.Flowable):
                 (0.625 + ((self.ax.height - y) * 8.75)) * units.mm)
 
     def _draw_blocks(self):
+        # One path for all blocks, with a rectangle per horizontal run.
+        p = self.canv.beginPath()
+        empty = True
         for y, row in enumerate(self.ax.grid):
-            for x, cell in enumerate(row):
-                if cell.block:
-                    self.canv.setFillColor(colors.black)
-                    left, top = self._at(x, y)
-                    right, bottom = self._at(x + 1, y + 1)
-                    self.canv.rect(left, top, right - left, bottom - top, fill=True, stroke=False)
+            for x0, x1 in spans(x for x, cell in enumerate(row) if cell.block):
+                left, top = self._at(x0, y)
+                right, bottom = self._at(x1, y + 1)
+                p.rect(left, top, right - left, bottom - top)
+                empty = False
+        if not empty:
+            self.canv.setFillColor(colors.black)
+            self.canv.drawPath(p, stroke=False, fill=True)
 
     def _draw_lines(self):
+        # Emptiness of each square, with a border of empty squares around the grid so that
+        # neighbors need no bounds checks. Square (x, y) is at empty[y + 1][x + 1].
+        empty = [[True] * (self.ax.width + 2)]
+        for row in self.ax.grid:
+            empty.append([True] + [cell.empty for cell in row] + [True])
+        empty.append([True] * (self.ax.width + 2))
+
         hard_edges = set()
         soft_edges = set()
-        for x in range(self.ax.width):
-            for y in range(self.ax.height):
-                if is_empty(self.ax, x, y):
+        for y in range(self.ax.height):
+            above, line, below = empty[y], empty[y + 1], empty[y + 2]
+            for x in range(self.ax.width):
+                if line[x + 1]:
                     continue
 
-                if is_empty(self.ax, x - 1, y):
+                if line[x]:
                     hard_edges.add((x, y + 1, x, y))
                 else:
                     soft_edges.add((x, y, x, y + 1))
-                if is_empty(self.ax, x + 1, y):
+                if line[x + 2]:
                     hard_edges.add((x + 1, y, x + 1, y + 1))
 
-                if is_empty(self.ax, x, y - 1):
+                if above[x + 1]:
                     hard_edges.add((x, y, x + 1, y))
                 else:
                     soft_edges.add((x, y, x + 1, y))
-                if is_empty(self.ax, x, y + 1):
+                if below[x + 1]:
                     hard_edges.add((x + 1, y + 1, x, y + 1))
 
         self._draw_soft_edges(soft_edges)
         self._draw_hard_edges(hard_edges)
 
     def _draw_soft_edges(self, soft_edges):
+        # Unit edges are merged into the longest straight lines they make, all in one path.
+        vertical = collections.defaultdict(list)
+        horizontal = collections.defaultdict(list)
+        for ax, ay, bx, by in soft_edges:
+            if ax == bx:
+                vertical[ax].append(ay)
+            else:
+                horizontal[ay].append(ax)
+
+        p = self.canv.beginPath()
+        for x, ys in sorted(vertical.items()):
+            for y0, y1 in spans(sorted(ys)):
+                p.moveTo(*self._at(x, y0))
+                p.lineTo(*self._at(x, y1))
+        for y, xs in sorted(horizontal.items()):
+            for x0, x1 in spans(sorted(xs)):
+                p.moveTo(*self._at(x0, y))
+                p.lineTo(*self._at(x1, y))
+
         self.canv.setFillColor(colors.transparent)
         self.canv.setStrokeColor(inner_line)
         self.canv.setLineWidth(0.25 * units.mm)
-        for ax, ay, bx, by in soft_edges:
-            ax1, ay1 = self._at(ax, ay)
-            bx1, by1 = self._at(bx, by)
-            p = self.canv.beginPath()
-            p.moveTo(ax1, ay1)
-            p.lineTo(bx1, by1)
-            p.close()
+        if soft_edges:
             self.canv.drawPath(p)
 
     def _draw_hard_edges(self, hard_edges):
@@ -196,9 +254,12 @@ class CrosswordGrid(flowables.Flowable):
         self.canv.setStrokeColor(outer_line)
         self.canv.setLineWidth(0.75 * units.mm)
 
-        while hard_edges:
-            # Pick the top-most, left-most starting edge.
-            curr = sorted(hard_edges)[0]
+        # Each polygon starts from the top-most, left-most edge not yet traced. Edges are only ever
+        # removed, so one pass over them in sorted order finds each start in turn.
+        hard_edges = set(hard_edges)
+        for curr in sorted(hard_edges):
+            if curr not in hard_edges:
+                continue
             hard_edges.remove(curr)
             ax, ay, bx, by = curr
             poly = [(ax, ay), (bx, by)]
@@ -254,6 +315,8 @@ class CrosswordGrid(flowables.Flowable):
         self.canv.setStrokeColor(circle_line)
         self.canv.setLineWidth(0.25 * units.mm)
 
+        p = self.canv.beginPath()
+        empty = True
         for y, row in enumerate(self.ax.grid):
             for x, cell in enumerate(row):
                 if "circle" in cell.style:
@@ -261,53 +324,40 @@ class CrosswordGrid(flowables.Flowable):
                     right, bottom = self._at(x + 1, y + 1)
                     cx, cy = (left + right) / 2, (top + bottom) / 2
                     r = right - cx - (0.25 * units.mm)
-                    p = self.canv.beginPath()
                     p.circle(cx, cy, r)
-                    self.canv.drawPath(p)
+                    empty = False
+        if not empty:
+            self.canv.drawPath(p)
 
     def _draw_numbers(self):
+        textobject = self.canv.beginText()
+        textobject.setFont("Helvetica", 7)
+        textobject.setFillColor(colors.black)
         for y, row in enumerate(self.ax.grid):
             for x, cell in enumerate(row):
                 if cell.number:
                     left, top = self._at(x, y)
-                    textobject = self.canv.beginText()
                     textobject.setTextOrigin(left + 1, top - 6)
-                    textobject.setFont("Helvetica", 7)
-                    textobject.setFillColor(colors.black)
-                    textobject.textLine(str(cell.number))
-                    self.canv.drawText(textobject)
+                    textobject.textOut(str(cell.number))
+        self.canv.drawText(textobject)
 
 
-def is_empty(ax, x, y):
-    if not ((0 <= x < ax.width) and (0 <= y < ax.height)):
-        return True
-    return ax.grid[y][x].empty
+def spans(xs):
+    # Yields (start, end) for each run of consecutive integers in increasing `xs`; `end` is one
+    # past the last.
+    start = end = None
+    for x in xs:
+        if x != end:
+            if start is not None:
+                yield start, end
+            start = x
+        end = x + 1
+    if start is not None:
+        yield start, end
 
 
 def main(args=None):
-    args = args or sys.argv[:]
-    parser = argparse.ArgumentParser(prog=args.pop(0))
-    parser.add_argument("input", metavar="IN.ax", nargs="?", type=argparse.FileType("r"))
-    parser.add_argument("output", metavar="OUT.pdf", nargs="?", type=argparse.FileType("wb"))
-    opts = parser.parse_args(args)
-
-    if opts.input is None:
-        opts.input = sys.stdin
-        input_name = "-"
-    else:
-        input_name = opts.input.name
-
-    if opts.output is None:
-        opts.output = sys.stdout
-
-    try:
-        pod = procyon.load(opts.input)
-    except procyon.ProcyonDecodeError as e:
-        print("%s:%s" % (input_name, e))
-        sys.exit(1)
-
-    pdf = ax2pdf(pod)
-    opts.output.write(pdf)
+    acrux.bin.batch.main("pdf", args)
 
 
 if __name__ == "__main__":
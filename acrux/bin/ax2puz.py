@@ -16,17 +16,34 @@
 # limitations under the License.
 
 import acrux
-import acrux.text
-import argparse
+import acrux.bin.batch
+import acrux.markup
 import itertools
-import procyon
-import puz
-import sys
+import struct
+
+# The layout of a .puz file is described at
+# https://code.google.com/archive/p/puz/wikis/FileFormat.wiki.
+_MAGIC = b"ACROSS&DOWN\0"
+_VERSION = b"1.4\0"
+_HEADER = struct.Struct("<H12sH8s4s2sH12sBBHHH")
+_CIB = struct.Struct("<BBHHH")
+_EXTENSION = struct.Struct("<4sHH")
+_PUZZLE_TYPE = 0x0001
+_CIRCLED = 0x80
+
+
+class PuzError(ValueError):
+    pass
 
 
 def ax2ipuz(pod):
-    ax = acrux.load(pod)
+    return to_puz(acrux.load(pod))
 
+
+def to_puz(ax):
+    # A puz.Puzzle, for callers that want to modify it further. dumps_puz() writes the same bytes
+    # without it.
+    import puz
     p = puz.Puzzle()
     p.title = ax.title
     p.author = ax.author
@@ -40,10 +57,7 @@ def ax2ipuz(pod):
     p.solution = "".join(solution_char(cell) for cell in all_cells)
 
     for clue in sorted(ax.clues.values(), key=lambda c: (c.number, c.direction.value)):
-        c = clue.text
-        c = acrux.text.strip_html(c)
-        c = acrux.text.to_latin1(c)
-        p.clues.append(c)
+        p.clues.append(acrux.markup.to_latin1(clue.rich))
 
     values = [cell_value(cell) for cell in all_cells]
     rebuses = sorted(set(v for v in values if len(v) > 1))
@@ -64,6 +78,157 @@ def ax2ipuz(pod):
     return p
 
 
+def dumps_puz(ax):
+    cells = list(itertools.chain(*ax.grid))
+    values = [cell_value(cell) for cell in cells]
+    solution = "".join(v[0] for v in values).encode("latin1")
+    fill = "".join(fill_char(cell) for cell in cells).encode("latin1")
+    title, author, copyright = ((s or "").encode("latin1")
+                                for s in (ax.title, ax.author, ax.copyright))
+    clues = [
+        acrux.markup.to_latin1(clue.rich).encode("latin1")
+        for clue in sorted(ax.clues.values(), key=lambda c: (c.number, c.direction.value))
+    ]
+
+    cib = cksum(_CIB.pack(ax.width, ax.height, len(clues), _PUZZLE_TYPE, 0))
+    solution_cksum = cksum(solution)
+    fill_cksum = cksum(fill)
+    text_cksum = _text_cksum(title, author, copyright, clues, 0)
+    file_cksum = _text_cksum(title, author, copyright, clues, cksum(fill, cksum(solution, cib)))
+    masked = bytes([  # XORed with "ICHEATED"
+        0x49 ^ (cib & 0xFF), 0x43 ^ (solution_cksum & 0xFF), 0x48 ^ (fill_cksum & 0xFF),
+        0x45 ^ (text_cksum & 0xFF), 0x41 ^ (cib >> 8), 0x54 ^ (solution_cksum >> 8),
+        0x45 ^ (fill_cksum >> 8), 0x44 ^ (text_cksum >> 8)
+    ])
+
+    out = bytearray(
+        _HEADER.pack(file_cksum, _MAGIC, cib, masked, _VERSION, b"", 0, b"", ax.width, ax.height,
+                     len(clues), _PUZZLE_TYPE, 0))
+    out += solution
+    out += fill
+    for s in (title, author, copyright, *clues, b""):
+        out += s
+        out += b"\0"
+
+    rebuses = sorted(set(v for v in values if len(v) > 1))
+    if rebuses:
+        index = {v: i for i, v in enumerate(rebuses)}
+        _extension(out, b"GRBS", bytes(1 + index[v] if v in index else 0 for v in values))
+        _extension(out, b"RTBL",
+                   "".join("%d:%s;" % (i, v) for i, v in enumerate(rebuses)).encode("latin1"))
+    if any("circle" in cell.style for cell in cells):
+        _extension(out, b"GEXT",
+                   bytes(_CIRCLED if "circle" in cell.style else 0 for cell in cells))
+    return bytes(out)
+
+
+def _text_cksum(title, author, copyright, clues, c):
+    for s in (title, author, copyright):
+        if s:
+            c = cksum(s + b"\0", c)
+    for s in clues:
+        c = cksum(s, c)
+    return c
+
+
+def _extension(out, code, data):
+    out += _EXTENSION.pack(code, len(data), cksum(data))
+    out += data
+    out += b"\0"
+
+
+def loads_puz(data):
+    # Returns the fields of a .puz file as a dict. Rebus squares and circles are keyed by the
+    # index of the square, in row-major order.
+    if len(data) < _HEADER.size:
+        raise PuzError("file is too short")
+    # The field at 0x1E is the checksum of a scrambled solution; the tag that says whether it is
+    # scrambled, and which the CIB covers, is the last.
+    (file_cksum, magic, cib, _, _, _, _, _, width, height, clue_count, puzzle_type,
+     scrambled) = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise PuzError("not a .puz file")
+    if cib != cksum(_CIB.pack(width, height, clue_count, puzzle_type, scrambled)):
+        raise PuzError("header checksum mismatch")
+    if scrambled:
+        raise PuzError("solution is scrambled")
+
+    size = width * height
+    pos = _HEADER.size
+    solution = data[pos:pos + size]
+    fill = data[pos + size:pos + (2 * size)]
+    pos += 2 * size
+    if len(fill) < size:
+        raise PuzError("file is too short")
+
+    strings = []
+    for _ in range(3 + clue_count + 1):
+        end = data.find(b"\0", pos)
+        if end < 0:
+            raise PuzError("file is too short")
+        strings.append(data[pos:end])
+        pos = end + 1
+    title, author, copyright = strings[:3]
+    clues = strings[3:-1]
+
+    c = _text_cksum(title, author, copyright, clues, cksum(fill, cksum(solution, cib)))
+    if strings[-1]:
+        c = cksum(strings[-1] + b"\0", c)  # Notes, from version 1.3 on.
+    if c != file_cksum:
+        raise PuzError("file checksum mismatch")
+
+    extensions = {}
+    while (pos + _EXTENSION.size) <= len(data):
+        code, length, ext_cksum = _EXTENSION.unpack_from(data, pos)
+        pos += _EXTENSION.size
+        ext = data[pos:pos + length]
+        pos += length + 1
+        if (len(ext) < length) or (cksum(ext) != ext_cksum):
+            raise PuzError("bad %s section" % code.decode("latin1"))
+        extensions[code] = ext
+
+    rebus = {}
+    if b"GRBS" in extensions:
+        table = {}
+        for entry in extensions.get(b"RTBL", b"").decode("latin1").split(";"):
+            if entry:
+                k, v = entry.split(":", 1)
+                table[int(k)] = v
+        rebus = {i: table[k - 1] for i, k in enumerate(extensions[b"GRBS"]) if k}
+    circles = set()
+    if b"GEXT" in extensions:
+        circles = {i for i, flags in enumerate(extensions[b"GEXT"]) if flags & _CIRCLED}
+
+    return {
+        "width": width,
+        "height": height,
+        "solution": solution.decode("latin1"),
+        "fill": fill.decode("latin1"),
+        "title": title.decode("latin1"),
+        "author": author.decode("latin1"),
+        "copyright": copyright.decode("latin1"),
+        "clues": [c.decode("latin1") for c in clues],
+        "notes": strings[-1].decode("latin1"),
+        "rebus": rebus,
+        "circles": circles,
+    }
+
+
+# The checksum rotates its 16 bits right by one, then adds the next byte. _ROTATE covers sums
+# that have overflowed 16 bits too, so the loop needs no masking until the end.
+_ROTATE = [0] * 0x10100
+_ROTATE[0:0x10000:2] = range(0x8000)
+_ROTATE[1:0x10000:2] = range(0x8000, 0x10000)
+_ROTATE[0x10000:] = _ROTATE[:0x100]
+
+
+def cksum(data, c=0):
+    rotate = _ROTATE
+    for b in data:
+        c = rotate[c] + b
+    return c & 0xFFFF
+
+
 def fill_char(cell):
     if cell.block:
         return "."
@@ -83,29 +248,7 @@ def solution_char(cell):
 
 
 def main(args=None):
-    args = args or sys.argv[:]
-    parser = argparse.ArgumentParser(prog=args.pop(0))
-    parser.add_argument("input", metavar="IN.ax", nargs="?", type=argparse.FileType("r"))
-    parser.add_argument("output", metavar="OUT.ipuz", nargs="?", type=argparse.FileType("wb"))
-    opts = parser.parse_args(args)
-
-    if opts.input is None:
-        opts.input = sys.stdin
-        input_name = "-"
-    else:
-        input_name = opts.input.name
-
-    if opts.output is None:
-        opts.output = sys.stdout
-
-    try:
-        pod = procyon.load(opts.input)
-    except procyon.ProcyonDecodeError as e:
-        print("%s:%s" % (input_name, e))
-        sys.exit(1)
-
-    p = ax2ipuz(pod)
-    opts.output.write(p.tobytes())
+    acrux.bin.batch.main("puz", args)
 
 
 if __name__ == "__main__":
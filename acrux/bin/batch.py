@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import acrux
+import acrux.bundle
+import acrux.cache
+import acrux.convert
+import acrux.io
+import argparse
+import collections
+import os
+import stat
+import sys
+
+# Formats written to stdout as text; the rest go to its binary buffer.
+TEXT_FORMATS = {"ipuz"}
+
+DEFAULT_TEMPLATE = "{name}.{fmt}"
+
+# Extensions of acrux source files. In the two-argument form, a second argument without one is the
+# output file.
+SOURCE_SUFFIXES = (".pn", ".ax")
+
+# One source document. `n` counts documents within the input `path`, and `index` across all
+# inputs, both from 1. `name` is the input's stem, with "-n" appended after the first document.
+Document = collections.namedtuple("Document", ["source", "path", "stem", "name", "n", "index"])
+
+
+class BatchError(Exception):
+    pass
+
+
+def documents(f, path, stem, index=0):
+    # Yields each document in `f` as it is read, so that only one is held at a time.
+    for n, source in enumerate(split_documents(f), 1):
+        name = stem if n == 1 else "%s-%d" % (stem, n)
+        yield Document(source, path, stem, name, n, index + n)
+
+
+def split_documents(f):
+    # Documents are separated by lines of "---", as ipuz2ax writes them. Blank ones are skipped.
+    lines = []
+    for line in f:
+        if line.rstrip("\r\n") == "---":
+            if any(l.strip() for l in lines):
+                yield "".join(lines)
+            lines = []
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        yield "".join(lines)
+
+
+def label(doc):
+    return doc.path if doc.n == 1 else "%s[%d]" % (doc.path, doc.n)
+
+
+def render(source, fmt, cache=None, name="-", key=None):
+    data = cache.get(source, fmt) if cache else None
+    if data is None:
+        ax = acrux.io.loader().load_bytes(source, name, "pn", cache, key)
+        data = acrux.convert.convert(ax, fmt)
+        if cache:
+            cache.put(source, fmt, data)
+    return data
+
+
+class StdoutWriter(object):
+    # Text formats can be concatenated; ipuz2ax reads them back one by one. Binary ones can't.
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.count = 0
+
+    def write(self, doc, data):
+        self.count += 1
+        if self.fmt in TEXT_FORMATS:
+            sys.stdout.write(data.decode("utf-8"))
+        elif self.count > 1:
+            raise BatchError("several .%s files can't share stdout; use --output or --archive" %
+                             self.fmt)
+        else:
+            sys.stdout.flush()
+            getattr(sys.stdout, "buffer", sys.stdout).write(data)
+
+    def close(self):
+        sys.stdout.flush()
+
+
+class FileWriter(object):
+    def __init__(self, fmt, template):
+        self.fmt = fmt
+        self.template = template
+
+    def write(self, doc, data):
+        path = member_name(self.template, doc, self.fmt)
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def close(self):
+        pass
+
+
+class ArchiveWriter(object):
+    def __init__(self, fmt, template, bundle):
+        self.fmt = fmt
+        self.template = template
+        self.bundle = bundle
+
+    def write(self, doc, data):
+        try:
+            self.bundle.add(member_name(self.template, doc, self.fmt), data)
+        except ValueError as e:
+            raise BatchError(str(e))
+
+    def close(self):
+        self.bundle.close()
+
+
+def member_name(template, doc, fmt):
+    try:
+        return template.format(name=doc.name, stem=doc.stem, n=doc.n, index=doc.index, fmt=fmt)
+    except (KeyError, IndexError, ValueError) as e:
+        raise BatchError("bad output template %r: %s" % (template, e))
+
+
+def is_source(path):
+    return path.endswith(SOURCE_SUFFIXES)
+
+
+def main(fmt, args=None):
+    args = args or sys.argv[:]
+    parser = argparse.ArgumentParser(prog=args.pop(0))
+    parser.add_argument(
+        "inputs",
+        metavar="IN.ax",
+        nargs="*",
+        help="sources, each holding one or more documents separated by \"---\" lines; "
+        "\"-\" or none reads stdin. With two arguments, a second that isn't a .pn or .ax file is "
+        "the output, as in `IN OUT`")
+    parser.add_argument(
+        "-o",
+        "--output",
+        metavar="TEMPLATE",
+        help="write each puzzle to a path formatted from TEMPLATE, with {name}, {stem}, {n}, "
+        "{index}, and {fmt}; inside an archive, the member name (default: %s)" % DEFAULT_TEMPLATE)
+    parser.add_argument(
+        "-a",
+        "--archive",
+        metavar="OUT.zip",
+        help="write puzzles into a .zip, .tar, .tar.gz, .tar.bz2 or .tar.xz archive as they are "
+        "converted, with a manifest of their hashes; \"-\" writes a tar stream to stdout")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="always render; don't read or write the cache")
+    opts = parser.parse_args(args)
+
+    # The original form, `IN OUT`, names a single output file: any second argument that isn't
+    # itself a source. As before, an OUT of "-" is stdout.
+    inputs = opts.inputs or ["-"]
+    if ((len(inputs) == 2) and not is_source(inputs[1]) and not opts.output
+            and not opts.archive):
+        inputs, output = inputs[:1], inputs[1]
+        if output != "-":
+            opts.output = output.replace("{", "{{").replace("}", "}}")
+
+    cache = None if opts.no_cache else acrux.cache.Cache()
+    try:
+        if opts.archive:
+            writer = ArchiveWriter(fmt, opts.output or DEFAULT_TEMPLATE,
+                                   acrux.bundle.create(opts.archive))
+        elif opts.output:
+            writer = FileWriter(fmt, opts.output)
+        else:
+            writer = StdoutWriter(fmt)
+    except OSError as e:
+        print("%s: %s" % (opts.archive, e.strerror), file=sys.stderr)
+        sys.exit(1)
+
+    failed = False
+    index = 0
+    try:
+        for path in inputs:
+            try:
+                f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+            except OSError as e:
+                print("%s: %s" % (path, e.strerror), file=sys.stderr)
+                failed = True
+                continue
+            stem = "stdin" if path == "-" else os.path.splitext(os.path.basename(path))[0]
+            try:
+                # A regular file's documents are known by its path, size and mtime, and their place
+                # in it; pipes and stdin, only by their contents.
+                file_key = None
+                if f is not sys.stdin:
+                    st = os.fstat(f.fileno())
+                    if stat.S_ISREG(st.st_mode):
+                        file_key = acrux.io.path_key(path, st)
+                for doc in documents(f, path, stem, index):
+                    index = doc.index
+                    key = file_key and (file_key + (doc.n, ))
+                    try:
+                        data = render(doc.source, fmt, cache, label(doc), key)
+                    except acrux.io.PuzzleLoadError as e:
+                        print(e, file=sys.stderr)
+                        failed = True
+                        continue
+                    except Exception as e:
+                        print("%s: %s: %s" % (label(doc), type(e).__name__, e), file=sys.stderr)
+                        failed = True
+                        continue
+                    writer.write(doc, data)
+            except UnicodeDecodeError as e:
+                print("%s: %s" % (path, e), file=sys.stderr)
+                failed = True
+            finally:
+                if f is not sys.stdin:
+                    f.close()
+        writer.close()
+    except BatchError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    except OSError as e:
+        print("%s: %s" % (e.filename or opts.archive or "-", e.strerror), file=sys.stderr)
+        sys.exit(1)
+    if failed:
+        sys.exit(1)
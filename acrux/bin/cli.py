@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import acrux
+import acrux.bundle
+import acrux.cache
+import acrux.convert
+import acrux.io
+import argparse
+import concurrent.futures
+import glob
+import itertools
+import os
+import sys
+
+
+def main(args=None):
+    args = args or sys.argv[:]
+    parser = argparse.ArgumentParser(prog=args.pop(0))
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    convert = subparsers.add_parser("convert", help="convert many puzzles in one process")
+    convert.set_defaults(run=convert_main)
+    convert.add_argument(
+        "inputs", metavar="IN", nargs="+", help="a source file, a directory of them, or a glob")
+    add_output_arguments(convert)
+    convert.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="convert N puzzles at a time in worker processes (0: one per CPU)")
+    convert.add_argument(
+        "--booklet", metavar="OUT.pdf", help="also write every puzzle into one PDF, a page each")
+    convert.add_argument(
+        "--bundle",
+        metavar="OUT.zip",
+        help="write outputs into one .zip or tar archive, with a manifest of their hashes, "
+        "instead of separate files")
+
+    watch = subparsers.add_parser("watch", help="convert puzzles in a directory as they change")
+    watch.set_defaults(run=watch_main)
+    watch.add_argument("directory", metavar="DIR")
+    add_output_arguments(watch)
+    watch.add_argument(
+        "--poll",
+        metavar="SECONDS",
+        type=float,
+        help="check for changes every SECONDS instead of using inotify")
+
+    serve = subparsers.add_parser("serve", help="convert puzzles over HTTP")
+    serve.set_defaults(run=serve_main)
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve.add_argument("--port", type=int, default=8080, help="port to listen on")
+    serve.add_argument(
+        "-j", "--jobs", metavar="N", type=int, help="PDF worker processes (default: one per CPU)")
+    serve.add_argument(
+        "--max-concurrent",
+        metavar="N",
+        type=int,
+        default=8,
+        help="conversions to run at once; further requests wait")
+    serve.add_argument(
+        "--cache-size", metavar="N", type=int, default=256, help="results to keep in memory")
+
+    opts = parser.parse_args(args)
+    if opts.command is None:
+        parser.error("a command is required")
+    opts.run(opts)
+
+
+def add_output_arguments(parser):
+    parser.add_argument(
+        "-f",
+        "--format",
+        dest="formats",
+        action="append",
+        choices=acrux.convert.FORMATS,
+        help="output format; may be repeated (default: all)")
+    parser.add_argument(
+        "-o", "--output-dir", metavar="DIR", help="directory for outputs (default: beside input)")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="always render; don't read or write the cache")
+
+
+def convert_main(opts):
+    formats = opts.formats or acrux.convert.FORMATS
+    sources = list(find_sources(opts.inputs))
+    cache = None if opts.no_cache else acrux.cache.Cache()
+    jobs = opts.jobs or os.cpu_count()
+    if opts.bundle:
+        try:
+            bundle = acrux.bundle.create(opts.bundle)
+        except OSError as e:
+            print("%s: %s" % (opts.bundle, e.strerror), file=sys.stderr)
+            sys.exit(1)
+        # Puzzles are rendered in the workers, but only this process writes to the bundle, adding
+        # each puzzle's outputs as they arrive.
+        with bundle:
+            results = run(jobs, formats, render_file, sources, itertools.repeat(formats),
+                          itertools.repeat(cache))
+            ok = report(
+                bundle_file(bundle, path, outputs, error)
+                for path, (outputs, error) in zip(sources, results))
+    else:
+        ok = report(
+            run(jobs, formats, convert_file, sources, itertools.repeat(formats),
+                itertools.repeat(opts.output_dir), itertools.repeat(cache)))
+    if opts.booklet:
+        ok = report([write_booklet(sources, opts.booklet, cache)]) and ok
+    if not ok:
+        sys.exit(1)
+
+
+def run(jobs, formats, fn, *iterables):
+    if jobs > 1:
+        # Workers are reused across puzzles, so each pays for its imports once. Results come back
+        # in input order, so error output is the same as a serial run.
+        with concurrent.futures.ProcessPoolExecutor(
+                jobs, initializer=acrux.convert.preload, initargs=(formats, )) as pool:
+            yield from pool.map(fn, *iterables)
+    else:
+        yield from map(fn, *iterables)
+
+
+def watch_main(opts):
+    # Everything is imported up front and stays loaded, so a rebuild costs only the load and
+    # render of the file that changed.
+    import acrux.watch
+    formats = opts.formats or acrux.convert.FORMATS
+    acrux.convert.preload(formats)
+    cache = None if opts.no_cache else acrux.cache.Cache()
+    changes = acrux.watch.changes(opts.directory, poll=opts.poll)
+    report(convert_file(path, formats, opts.output_dir, cache)
+           for path in find_sources([opts.directory]))
+    try:
+        for paths in changes:
+            for path in paths:
+                error = convert_file(path, formats, opts.output_dir, cache)
+                if error is None:
+                    print("%s: converted" % path)
+                else:
+                    print(error, file=sys.stderr)
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_main(opts):
+    import acrux.server
+    try:
+        acrux.server.serve(
+            opts.host,
+            opts.port,
+            jobs=opts.jobs,
+            max_concurrent=opts.max_concurrent,
+            cache_size=opts.cache_size)
+    except KeyboardInterrupt:
+        pass
+
+
+def report(errors):
+    ok = True
+    for error in errors:
+        if error is not None:
+            print(error, file=sys.stderr)
+            ok = False
+    return ok
+
+
+def find_sources(inputs):
+    for path in inputs:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, "*.pn")))
+        elif any(c in path for c in "*?["):
+            yield from sorted(glob.glob(path, recursive=True))
+        else:
+            yield path
+
+
+def render_file(path, formats, cache=None):
+    # Returns ([(fmt, data), ...], None), or (None, error).
+    try:
+        key = acrux.io.path_key(path, os.stat(path))
+        with open(path, "rb") as f:
+            source = f.read()
+    except OSError as e:
+        return None, "%s: %s" % (path, e.strerror)
+
+    outputs = []
+    ax = None
+    try:
+        for fmt in formats:
+            data = cache.get(source, fmt) if cache else None
+            if data is None:
+                # Only parse if some format actually missed the cache, and then only once.
+                if ax is None:
+                    ax = acrux.io.loader().load_bytes(source, path, cache=cache, key=key)
+                data = acrux.convert.convert(ax, fmt)
+                if cache:
+                    cache.put(source, fmt, data)
+            outputs.append((fmt, data))
+    except acrux.io.PuzzleLoadError as e:
+        return None, str(e)
+    except Exception as e:
+        return None, "%s: %s: %s" % (path, type(e).__name__, e)
+    return outputs, None
+
+
+def convert_file(path, formats, output_dir=None, cache=None):
+    outputs, error = render_file(path, formats, cache)
+    if error is not None:
+        return error
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    output_dir = output_dir or os.path.dirname(path)
+    try:
+        for fmt, data in outputs:
+            output = os.path.join(output_dir, "%s.%s" % (stem, fmt))
+            if os.path.abspath(output) == os.path.abspath(path):
+                continue  # An .ipuz or .puz input isn't overwritten with its own conversion.
+            with open(output, "wb") as f:
+                f.write(data)
+    except Exception as e:
+        return "%s: %s: %s" % (path, type(e).__name__, e)
+    return None
+
+
+def bundle_file(bundle, path, outputs, error):
+    if error is not None:
+        return error
+    stem = os.path.splitext(os.path.basename(path))[0]
+    try:
+        for fmt, data in outputs:
+            bundle.add("%s.%s" % (stem, fmt), data)
+    except ValueError as e:
+        return "%s: %s" % (path, e)
+    return None
+
+
+def write_booklet(paths, output, cache=None):
+    axes = []
+    for path in paths:
+        try:
+            axes.append(acrux.io.loader().load_path(path, cache))
+        except Exception:
+            continue  # Already reported by convert_file().
+    try:
+        data = acrux.convert.backend("pdf").renderer().render_booklet(axes)
+        with open(output, "wb") as f:
+            f.write(data)
+    except Exception as e:
+        return "%s: %s: %s" % (output, type(e).__name__, e)
+    return None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import acrux
+import acrux.text
+import argparse
+import itertools
+import json
+import procyon
+import re
+import sys
+
+# Grid characters for cells that can't stand for themselves: rebuses, and circled cells with no
+# lowercase form. Private-use characters follow if these run out.
+_SUB_KEYS = "♥♦♣♠★☆●○■□▲△◆◇"
+
+_ITALIC_TAG = re.compile(r"(</?i>)")
+_MARKUP_ESCAPE = re.compile(r"([*\\])")
+_SPACE = re.compile(r"\s*")
+
+
+def ipuz2ax(ipuz):
+    return acrux.load(to_pod(ipuz))
+
+
+def to_pod(ipuz):
+    def clue_texts(ax):
+        # Clues in ipuz are keyed by number; in acrux, by answer.
+        by_number = {(c.number, c.direction): key for key, c in ax.clues.items()}
+        texts = {}
+        for direction, clues in ipuz.get("clues", {}).items():
+            direction = acrux.Dir.DOWN if direction.split(":")[0] == "Down" else acrux.Dir.ACROSS
+            for clue in clues:
+                if isinstance(clue, dict):
+                    number, text = clue.get("number"), clue.get("clue")
+                elif isinstance(clue, list):
+                    number, text = clue[0], clue[1]
+                else:
+                    continue  # Unnumbered; nothing to attach it to.
+                try:
+                    number = int(number)
+                except (TypeError, ValueError):
+                    continue  # A range like "1-5"; there's no single entry to attach it to.
+                key = by_number.get((number, direction))
+                if key is not None:
+                    texts[key] = to_markup(text)
+        return texts
+
+    metadata = {k: ipuz[k] for k in ["title", "author", "copyright"] if k in ipuz}
+    return make_pod(_read_cells(ipuz), metadata, clue_texts)
+
+
+def make_pod(cells, metadata, clue_texts):
+    # Builds a pod from rows of cells: None for an empty cell, "#" for a block, or (text, circled).
+    # `clue_texts` is given the Crossword for the grid alone, so that it can match clues to its
+    # numbering, and returns markup keyed like Crossword.clues.
+    grid, subs = _encode_grid(cells)
+    pod = dict(metadata)
+    pod["grid"] = grid
+    if subs:
+        pod["subs"] = subs
+
+    ax = acrux.load(pod)
+    texts = clue_texts(ax)
+    counts = {}
+    for answer, i in ax.clues:
+        counts[answer] = max(counts.get(answer, 0), i + 1)
+    clues = pod["clues"] = {}
+    for c in sorted(ax.clues.values(), key=lambda c: (c.direction.value, c.number)):
+        if c.answer in clues:
+            continue
+        if counts[c.answer] == 1:
+            clues[c.answer] = texts.get((c.answer, 0), "")
+        else:
+            clues[c.answer] = [texts.get((c.answer, i), "") for i in range(counts[c.answer])]
+    return pod
+
+
+def _read_cells(ipuz):
+    block = ipuz.get("block", "#")
+    empty = ipuz.get("empty", 0)
+    styles = ipuz.get("styles", {})
+    # The solution is optional in ipuz, but the puzzle grid holds only clue numbers; without the
+    # solution, there are no answers to load.
+    if ipuz.get("solution") is None:
+        raise ValueError("ipuz has no solution")
+    if ipuz.get("puzzle") is None:
+        raise ValueError("ipuz has no puzzle grid")
+    rows = []
+    for puzzle_row, solution_row in zip(ipuz["puzzle"], ipuz["solution"]):
+        rows.append([])
+        for cell, value in zip(puzzle_row, solution_row):
+            style = None
+            if isinstance(cell, dict):
+                style = cell.get("style")
+                cell = cell.get("cell", empty)
+            if isinstance(style, str):
+                style = styles.get(style)
+            if isinstance(value, dict):
+                value = value.get("value")
+
+            if (cell == block) or (value == block):
+                rows[-1].append("#")
+            elif (cell is None) or (value is None) or (value == ""):
+                rows[-1].append(None)
+            else:
+                circled = bool(style) and (style.get("shapebg") == "circle")
+                rows[-1].append((str(value), circled))
+    return rows
+
+
+def _encode_grid(cells):
+    # Plain letters stand for themselves. A circled letter is its lowercase form, as in
+    # hand-written sources, unless that letter is also used plainly.
+    plain = set()
+    for row in cells:
+        for cell in row:
+            if isinstance(cell, tuple) and not cell[1] and _is_plain(cell[0]):
+                plain.add(cell[0])
+    spare = (ch for ch in itertools.chain(_SUB_KEYS, map(chr, range(0xE000, 0xF900)))
+             if ch not in plain)
+
+    subs = {}
+    keys = {None: " ", "#": "#"}
+    lines = []
+    for row in cells:
+        line = []
+        for cell in row:
+            key = keys.get(cell)
+            if key is None:
+                text, circled = cell
+                if not circled and _is_plain(text):
+                    key = text
+                else:
+                    lower = text.lower()
+                    if (circled and (len(text) == 1) and (lower != text) and (lower not in plain)
+                            and (lower not in subs)):
+                        key = lower
+                    else:
+                        key = next(spare)
+                    subs[key] = {"text": text, "style": "circle"} if circled else text
+                keys[cell] = key
+            line.append(key)
+        lines.append("".join(line))
+    return "".join("%s\n" % line for line in lines), subs
+
+
+def _is_plain(text):
+    return (len(text) == 1) and (text not in " #")
+
+
+def to_markup(text):
+    # ipuz clues are HTML. <i> becomes *italics*; other tags are dropped and entities decoded.
+    runs = []
+    italic = False
+    for part in _ITALIC_TAG.split(text):
+        if part == "<i>":
+            italic = True
+        elif part == "</i>":
+            italic = False
+        elif part:
+            part = _MARKUP_ESCAPE.sub(r"\\\1", acrux.text.strip_html(part)).replace("$", "$$")
+            if runs and (runs[-1][0] == italic):
+                runs[-1][1] += part
+            else:
+                runs.append([italic, part])
+
+    result = []
+    for italic, part in runs:
+        stripped = part.strip()
+        if italic and stripped:
+            # Italics can't begin or end with a space, so it goes outside the asterisks.
+            start = part.index(stripped)
+            end = start + len(stripped)
+            result.append("%s*%s*%s" % (part[:start], stripped, part[end:]))
+        else:
+            result.append(part)
+    return "".join(result)
+
+
+def iter_ipuz(f, chunk_size=65536):
+    # Yields each ipuz document in `f`, which may hold several in a row, reading only as far as
+    # the end of each. Documents may be wrapped as ipuz({...}), as the spec allows.
+    decoder = json.JSONDecoder()
+    buf = ""
+    eof = False
+    line = 0
+
+    def read(n):
+        nonlocal buf, eof
+        data = f.read(max(n, chunk_size))
+        if not data:
+            eof = True
+        buf += data
+
+    def skip_space(pos):
+        while True:
+            pos = _SPACE.match(buf, pos).end()
+            if (pos < len(buf)) or eof:
+                return pos
+            read(chunk_size)
+
+    pos = 0
+    while True:
+        buf = buf[pos:]
+        pos = skip_space(0)
+        if pos == len(buf):
+            return
+        while not eof and (len(buf) < (pos + 5)):
+            read(chunk_size)
+        wrapped = buf.startswith("ipuz(", pos)
+        if wrapped:
+            pos = skip_space(pos + 5)
+
+        try:
+            doc, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                e.lineno += line
+                raise
+            read(len(buf))  # Doubling keeps re-parsing a large document linear overall.
+            pos = 0
+            continue
+
+        if wrapped:
+            end = skip_space(end)
+            if not buf.startswith(")", end):
+                raise json.JSONDecodeError("Expecting ')'", buf, end)
+            end = skip_space(end + 1)  # Reads on if the ")" ended the buffer.
+            if buf.startswith(";", end):
+                end += 1
+
+        line += buf.count("\n", 0, end)
+        pos = end
+        yield doc
+
+
+def main(args=None):
+    args = args or sys.argv[:]
+    parser = argparse.ArgumentParser(prog=args.pop(0))
+    parser.add_argument("input", metavar="IN.ipuz", nargs="?", type=argparse.FileType("r"))
+    parser.add_argument("output", metavar="OUT.pn", nargs="?", type=argparse.FileType("w"))
+    opts = parser.parse_args(args)
+
+    if opts.input is None:
+        opts.input = sys.stdin
+        input_name = "-"
+    else:
+        input_name = opts.input.name
+
+    if opts.output is None:
+        opts.output = sys.stdout
+
+    # Several puzzles in the input become several documents in the output, separated by "---".
+    try:
+        for i, ipuz in enumerate(iter_ipuz(opts.input)):
+            if i:
+                opts.output.write("---\n")
+            opts.output.write(procyon.dumps(to_pod(ipuz)))
+    except json.JSONDecodeError as e:
+        print("%s:%d:%d: %s" % (input_name, e.lineno, e.colno, e.msg))
+        sys.exit(1)
+    except KeyError as e:
+        print("%s: missing %s" % (input_name, e))
+        sys.exit(1)
+    except (TypeError, ValueError) as e:
+        print("%s: %s" % (input_name, e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import acrux
+import acrux.bin.ax2puz
+import acrux.bin.ipuz2ax
+import argparse
+import html
+import procyon
+import sys
+
+
+def puz2ax(data):
+    return acrux.load(to_pod(data))
+
+
+def to_pod(data):
+    p = acrux.bin.ax2puz.loads_puz(data)
+
+    cells = []
+    for y in range(p["height"]):
+        cells.append([])
+        for x in range(p["width"]):
+            i = (y * p["width"]) + x
+            if p["fill"][i] == ".":
+                cells[-1].append("#")
+            elif p["solution"][i] == ".":
+                cells[-1].append(None)
+            else:
+                text = p["rebus"].get(i, p["solution"][i])
+                cells[-1].append((text, i in p["circles"]))
+
+    def clue_texts(ax):
+        # .puz clues are in order of number, across before down, which is also how ax2puz wrote
+        # them.
+        order = sorted(ax.clues, key=lambda k: (ax.clues[k].number, ax.clues[k].direction.value))
+        return {
+            key: acrux.bin.ipuz2ax.to_markup(html.escape(text))
+            for key, text in zip(order, p["clues"])
+        }
+
+    metadata = {k: p[k] for k in ["title", "author", "copyright"]}
+    return acrux.bin.ipuz2ax.make_pod(cells, metadata, clue_texts)
+
+
+def main(args=None):
+    args = args or sys.argv[:]
+    parser = argparse.ArgumentParser(prog=args.pop(0))
+    parser.add_argument("input", metavar="IN.puz", nargs="?", type=argparse.FileType("rb"))
+    parser.add_argument("output", metavar="OUT.pn", nargs="?", type=argparse.FileType("w"))
+    opts = parser.parse_args(args)
+
+    if opts.input is None:
+        opts.input = sys.stdin.buffer
+        input_name = "-"
+    else:
+        input_name = opts.input.name
+
+    if opts.output is None:
+        opts.output = sys.stdout
+
+    try:
+        pod = to_pod(opts.input.read())
+    except acrux.bin.ax2puz.PuzError as e:
+        print("%s: %s" % (input_name, e))
+        sys.exit(1)
+    opts.output.write(procyon.dumps(pod))
+
+
+if __name__ == "__main__":
+    main()
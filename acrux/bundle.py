@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import acrux
+import hashlib
+import io
+import json
+import sys
+import tarfile
+import time
+import zipfile
+
+MANIFEST = "manifest.json"
+
+# Members with these extensions are already compressed: reportlab deflates each PDF page as it
+# renders it. In a .zip they are stored as they are rather than deflated a second time.
+COMPRESSED = (".pdf", )
+
+# Archive extensions, and the tarfile compression for each.
+TAR_SUFFIXES = [
+    ((".tar.gz", ".tgz"), "gz"),
+    ((".tar.bz2", ".tbz2"), "bz2"),
+    ((".tar.xz", ".txz"), "xz"),
+]
+
+
+# Many outputs written into one .zip or tar archive, each as soon as it is added, so that a bundle
+# of any size never has to be held in memory. Closing the bundle adds a manifest listing each
+# member's size and SHA-256.
+class Bundle(object):
+    def __init__(self, f, kind="zip", compression=""):
+        self.kind = kind
+        self.files = []
+        self._names = set()
+        self._owned = None
+        if kind == "zip":
+            self._archive = zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED)
+        else:
+            # A stream-mode tarfile never seeks, so the archive can go to a pipe.
+            self._archive = tarfile.open(fileobj=f, mode="w|" + compression)
+
+    def add(self, name, data):
+        if name in self._names or name == MANIFEST:
+            raise ValueError("%s: already in bundle" % name)
+        self._names.add(name)
+        self.files.append({
+            "name": name,
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        })
+        self._write(name, data)
+
+    def close(self):
+        manifest = {"acrux": acrux.__version__, "files": self.files}
+        self._write(MANIFEST, (json.dumps(manifest, indent=2) + "\n").encode("utf-8"))
+        self._archive.close()
+        if self._owned:
+            self._owned.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write(self, name, data):
+        if self.kind == "zip":
+            info = zipfile.ZipInfo(name, time.localtime()[:6])
+            info.external_attr = 0o644 << 16
+            if name.endswith(COMPRESSED):
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+
+
+def create(path):
+    # The kind of archive comes from the extension of `path`; "-" is an uncompressed tar stream on
+    # stdout. Anything other than a .zip or a known tar extension is written as a plain tar.
+    if path == "-":
+        sys.stdout.flush()
+        return Bundle(getattr(sys.stdout, "buffer", sys.stdout), "tar")
+    f = open(path, "wb")
+    try:
+        if path.endswith(".zip"):
+            bundle = Bundle(f, "zip")
+        else:
+            compression = next((c for suffixes, c in TAR_SUFFIXES if path.endswith(suffixes)), "")
+            bundle = Bundle(f, "tar", compression)
+    except BaseException:
+        f.close()
+        raise
+    bundle._owned = f
+    return bundle
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import acrux
+import hashlib
+import json
+import os
+import pickle
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Loaded puzzles are cached as pickles under this format name plus the kind of source they were
+# parsed from, as in "ax.pn". Entry keys already cover the code that wrote them; the header also
+# guards against a pickle written by a different pickle layout, which then fails to load and counts
+# as a miss.
+LOADED = "ax"
+LOADED_HEADER = b"acrux-ax 1\n"
+
+# The total size of the entries, at the top of the cache directory. Processes update it without
+# locking, so it can drift; each eviction rescans and corrects it.
+SIZE_FILE = "size"
+
+_code_version = None
+
+
+def code_version():
+    # The acrux version and a hash of acrux's own source, so that any change to the code, released
+    # or not, gets new cache keys. Outputs rendered by older code are never returned; they age out.
+    global _code_version
+    if _code_version is None:
+        root = os.path.dirname(os.path.abspath(acrux.__file__))
+        paths = sorted(
+            os.path.join(parent, name) for parent, _, names in os.walk(root) for name in names
+            if name.endswith(".py"))
+        h = hashlib.sha256()
+        for path in paths:
+            h.update(os.path.relpath(path, root).encode("utf-8") + b"\0")
+            try:
+                with open(path, "rb") as f:
+                    h.update(f.read())
+            except OSError:
+                pass
+        _code_version = "%s-%s" % (acrux.__version__, h.hexdigest()[:16])
+    return _code_version
+
+
+def default_path():
+    if os.environ.get("ACRUX_CACHE_DIR"):
+        return os.environ["ACRUX_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "acrux")
+
+
+# Rendered outputs, keyed by source (raw .pn text or bytes, or a loaded pod), output format, and
+# code_version(). Reading an entry bumps its mtime; once the cache grows past max_size, the
+# entries with the oldest mtimes are removed.
+class Cache(object):
+    def __init__(self, path=None, max_size=DEFAULT_MAX_SIZE):
+        self.path = path or default_path()
+        self.max_size = max_size
+
+    def get(self, source, fmt):
+        path = self._entry(source, fmt)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # A read-only cache still hits; its entries just don't age by use.
+        return data
+
+    def put(self, source, fmt, data):
+        path = self._entry(source, fmt)
+        tmp = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return  # A cache that can't be written is just a cache that always misses.
+
+        # Only a cache without a size file, new or from an older acrux, is scanned here.
+        size = self._read_size()
+        if size is None:
+            size = sum(size for _, size, _ in self._entries())
+        else:
+            size += len(data)
+        if size > self.max_size:
+            self._evict()
+        else:
+            self._write_size(size)
+
+    # `kind` is what the source was parsed as: "pn", "puz" or "ipuz". The same bytes parsed as
+    # another kind are another entry.
+    def get_loaded(self, source, kind="pn"):
+        data = self.get(source, "%s.%s" % (LOADED, kind))
+        if (data is None) or not data.startswith(LOADED_HEADER):
+            return None
+        try:
+            return pickle.loads(data[len(LOADED_HEADER):])
+        except Exception:
+            return None
+
+    def put_loaded(self, source, ax, kind="pn"):
+        data = LOADED_HEADER + pickle.dumps(ax, pickle.HIGHEST_PROTOCOL)
+        self.put(source, "%s.%s" % (LOADED, kind), data)
+
+    def _entry(self, source, fmt):
+        if isinstance(source, str):
+            kind, source = "pn", source.encode("utf-8")
+        elif isinstance(source, bytes):
+            kind = "pn"
+        else:
+            kind = "pod"
+            source = json.dumps(source, sort_keys=True, ensure_ascii=False, default=repr)
+            source = source.encode("utf-8")
+        key = hashlib.sha256(("acrux %s %s %s\0" % (code_version(), kind, fmt)).encode("utf-8"))
+        key.update(source)
+        digest = key.hexdigest()
+        return os.path.join(self.path, digest[:2], digest[2:])
+
+    def _read_size(self):
+        try:
+            with open(os.path.join(self.path, SIZE_FILE)) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_size(self, size):
+        path = os.path.join(self.path, SIZE_FILE)
+        tmp = "%s.%d.tmp" % (path, os.getpid())
+        try:
+            with open(tmp, "w") as f:
+                f.write("%d\n" % size)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        # Entries are all in subdirectories; the top level holds only the size file.
+        for parent, _, names in os.walk(self.path):
+            if parent == self.path:
+                continue
+            for name in names:
+                path = os.path.join(parent, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, path
+
+    def _evict(self):
+        # Trim to 90% of the limit, so that a full cache doesn't rescan on every put.
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= (self.max_size * 9 // 10):
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            size -= entry_size
+        self._write_size(size)
+
+
+def load(source, parse, cache=None, kind="pn"):
+    # Returns the Crossword for `source`, which parse() turns into a pod. If any earlier run loaded
+    # the same source as the same kind, it is unpickled from `cache`, skipping both parse() and
+    # acrux.load().
+    ax = cache.get_loaded(source, kind) if cache else None
+    if ax is None:
+        ax = acrux.load(parse(source))
+        if cache:
+            cache.put_loaded(source, ax, kind)
+    return ax
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import acrux
+import importlib
+
+FORMATS = ["puz", "ipuz", "pdf"]
+
+# Each format's backend is imported the first time it is needed, so that a process converting
+# only to .puz never loads reportlab.
+BACKENDS = {
+    "puz": "acrux.bin.ax2puz",
+    "ipuz": "acrux.bin.ax2ipuz",
+    "pdf": "acrux.bin.ax2pdf",
+}
+
+
+def backend(fmt):
+    if fmt not in BACKENDS:
+        raise ValueError("unknown format: %s" % fmt)
+    return importlib.import_module(BACKENDS[fmt])
+
+
+def preload(formats=FORMATS):
+    # Suitable as a process pool initializer, so that workers pay for imports before their first
+    # job rather than during it.
+    for fmt in formats:
+        backend(fmt)
+
+
+def convert(ax, fmt):
+    module = backend(fmt)
+    if fmt == "puz":
+        return module.dumps_puz(ax)
+    elif fmt == "ipuz":
+        return module.dumps_ipuz(module.to_ipuz(ax), indent=2).encode("utf-8")
+    return module.to_pdf(ax)
+
+
+def convert_pod(pod, fmt, cache=None):
+    data = cache.get(pod, fmt) if cache else None
+    if data is None:
+        data = convert(acrux.load(pod), fmt)
+        if cache:
+            cache.put(pod, fmt, data)
+    return data
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import acrux
+import acrux.cache
+import collections
+import hashlib
+import importlib
+import io
+import os
+import procyon
+import threading
+
+DEFAULT_MAX_SIZE = 256
+
+
+class PuzzleLoadError(ValueError):
+    # Why `name` couldn't be loaded. `error` is the underlying exception; `lineno` and `colno` are
+    # its position in the source, from 1, if it had one.
+    def __init__(self, name, error):
+        super(PuzzleLoadError, self).__init__(name, error)
+        self.name = name
+        self.error = error
+        self.lineno = getattr(error, "lineno", None)
+        self.colno = getattr(error, "colno", None)
+
+    def __str__(self):
+        if isinstance(self.error, procyon.ProcyonDecodeError):
+            return "%s:%s" % (self.name, self.error)  # Already prefixed with line and column.
+        elif isinstance(self.error, OSError):
+            return "%s: %s" % (self.name, self.error.strerror)
+        elif self.lineno is not None:
+            return "%s:%d:%d: %s" % (self.name, self.lineno, self.colno,
+                                     getattr(self.error, "msg", self.error))
+        return "%s: %s: %s" % (self.name, type(self.error).__name__, self.error)
+
+
+# Loaded puzzles, kept in memory so that loading the same source again skips parsing entirely. A
+# file loaded by path is looked up by (path, size, mtime_ns), so it isn't even read again while
+# unchanged; bytes and streams, by a hash of their contents. The max_size most recently used are
+# kept. The Crosswords returned are shared between callers, who must not modify them.
+class Loader(object):
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._loaded = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_path(self, path, cache=None):
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            raise PuzzleLoadError(path, e)
+        key = path_key(path, st)
+        ax = self._get(key)
+        if ax is None:
+            try:
+                with open(path, "rb") as f:
+                    source = f.read()
+            except OSError as e:
+                raise PuzzleLoadError(path, e)
+            ax = self.load_bytes(source, path, cache=cache, key=key)
+        return ax
+
+    def load_bytes(self, source, name="-", kind=None, cache=None, key=None):
+        # `kind` is "puz", "ipuz" or "pn"; by default, it comes from the extension of `name`.
+        # `key`, if given, stands in for a hash of `source`: a caller that has already read a file
+        # passes its path_key(), so that the contents needn't be hashed.
+        if isinstance(source, str):
+            source = source.encode("utf-8")
+        kind = kind or source_kind(name)
+        key = key or ("sha256", kind, hashlib.sha256(source).digest())
+        ax = self._get(key)
+        if ax is None:
+            ax = _load(source, name, kind, cache)
+            self._put(key, ax)
+        return ax
+
+    def load_file(self, f, name=None, kind=None, cache=None):
+        # For stdin and other streams, which have no useful mtime.
+        return self.load_bytes(f.read(), name or getattr(f, "name", "-"), kind, cache)
+
+    def clear(self):
+        with self._lock:
+            self._loaded.clear()
+
+    def _get(self, key):
+        with self._lock:
+            ax = self._loaded.get(key)
+            if ax is not None:
+                self._loaded.move_to_end(key)
+            return ax
+
+    def _put(self, key, ax):
+        with self._lock:
+            self._loaded[key] = ax
+            self._loaded.move_to_end(key)
+            while len(self._loaded) > self.max_size:
+                self._loaded.popitem(last=False)
+
+
+def _load(source, name, kind, cache):
+    try:
+        return acrux.cache.load(source, lambda source: to_pod(source, kind), cache, kind)
+    except Exception as e:
+        raise PuzzleLoadError(name, e)
+
+
+_loader = None
+
+
+def loader():
+    # A shared Loader for callers that don't need their own.
+    global _loader
+    if _loader is None:
+        _loader = Loader()
+    return _loader
+
+
+def path_key(path, st):
+    # Identifies the contents of the file at `path` from its os.stat() result, taken before it was
+    # read.
+    return ("path", os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def source_kind(name):
+    if name.endswith(".puz"):
+        return "puz"
+    elif name.endswith(".ipuz"):
+        return "ipuz"
+    return "pn"
+
+
+def to_pod(source, kind="pn"):
+    # Returns the pod for `source`: acrux source, a .puz, or the first puzzle of an .ipuz.
+    if kind == "puz":
+        return importlib.import_module("acrux.bin.puz2ax").to_pod(source)
+    text = source.decode("utf-8")
+    if kind == "ipuz":
+        ipuz2ax = importlib.import_module("acrux.bin.ipuz2ax")
+        for ipuz in ipuz2ax.iter_ipuz(io.StringIO(text)):
+            return ipuz2ax.to_pod(ipuz)
+        raise ValueError("no puzzle in file")
+    return procyon.load(io.StringIO(text))
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import functools
+import html
+import re
+from . import text as _text
+
+# Clue text is parsed once into a tuple of nodes, then rendered as often as needed. A node is one
+# of: a str of literal text; a Ref to one or more entries, named with an optional conjunction
+# ("and" for ${A & B}, "or" for ${A | B}); or an Italic span with nodes of its own.
+Ref = collections.namedtuple("Ref", ["names", "conjunction"])
+Italic = collections.namedtuple("Italic", ["children"])
+
+# Once clues are numbered, resolve() replaces each Ref with a Name: the Ref and the text it stands
+# for, such as "12-across". Resolved nodes are what Clue.rich holds, and what the to_*() renderers
+# below accept.
+Name = collections.namedtuple("Name", ["ref", "text"])
+
+_PATTERN = re.compile(
+    r"""
+      \$
+      ( [A-Za-z0-9._/+-]+ (?:\[[0-9]+\])?
+      | \{ (.*?) \}
+      | \$
+      )
+    | \*
+      ( [^\s\\]
+        (?: (?:[^\\]|\\.)*?
+            [^\s\\]
+        )?
+      )
+      \*
+    | \\(.)
+    | (.[^*$\\]*)
+    """, re.X)
+
+
+@functools.lru_cache(maxsize=16384)
+def parse(text):
+    nodes = []
+    pos = 0
+    for m in _PATTERN.finditer(text):
+        if m.start() > pos:
+            _append_text(nodes, text[pos:m.start()])  # Only newlines fall through the pattern.
+        pos = m.end()
+
+        if m.group(1) is not None:
+            if m.group(1) == "$":
+                _append_text(nodes, "$")
+            elif m.group(2) is not None:
+                if "&" in m.group(2):
+                    names = tuple(x.strip() for x in m.group(2).split("&"))
+                    nodes.append(Ref(names, "and"))
+                elif "|" in m.group(2):
+                    names = tuple(x.strip() for x in m.group(2).split("|"))
+                    nodes.append(Ref(names, "or"))
+                else:
+                    nodes.append(Ref((m.group(2).strip(), ), None))
+            else:
+                nodes.append(Ref((m.group(1), ), None))
+        elif m.group(3) is not None:
+            nodes.append(Italic(parse(m.group(3))))
+        elif m.group(4) is not None:
+            _append_text(nodes, m.group(4))
+        else:
+            _append_text(nodes, m.group(5))
+    if pos < len(text):
+        _append_text(nodes, text[pos:])
+    return tuple(nodes)
+
+
+def _append_text(nodes, text):
+    if nodes and isinstance(nodes[-1], str):
+        nodes[-1] += text
+    else:
+        nodes.append(text)
+
+
+def resolve(nodes, name_ref):
+    # `name_ref` turns a Ref into text, such as "12-across".
+    resolved = []
+    for node in nodes:
+        if isinstance(node, str):
+            resolved.append(node)
+        elif isinstance(node, Ref):
+            resolved.append(Name(node, name_ref(node)))
+        else:
+            resolved.append(Italic(resolve(node.children, name_ref)))
+    return tuple(resolved)
+
+
+def to_html(nodes):
+    parts = []
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(html.escape(node))
+        elif isinstance(node, Name):
+            parts.append(node.text)
+        else:
+            parts.append("<i>%s</i>" % to_html(node.children))
+    return "".join(parts)
+
+
+def to_plain(nodes):
+    parts = []
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(node)
+        elif isinstance(node, Name):
+            parts.append(node.text)
+        else:
+            parts.append(to_plain(node.children))
+    return "".join(parts)
+
+
+def to_latin1(nodes):
+    return _text.to_latin1(to_plain(nodes))
+
+
+def to_reportlab(nodes):
+    # reportlab's Paragraph takes the same <i> tags and entities as HTML, in Latin-1.
+    return _text.to_latin1(to_html(nodes))
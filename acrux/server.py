@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import acrux
+import acrux.convert
+import acrux.io
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import http
+import itertools
+import json
+
+MAX_HEADERS = 100
+
+CONTENT_TYPES = {
+    "puz": "application/x-crossword",
+    "ipuz": "application/json; charset=utf-8",
+    "pdf": "application/pdf",
+}
+
+
+class Server(object):
+    # Converts puzzles posted to /convert/{puz,ipuz,pdf}. The body is either .pn source or, with
+    # Content-Type: application/json, a pod. PDFs are rendered in a process pool, since reportlab
+    # is CPU-bound; the other formats are cheap enough for a thread. At most max_concurrent
+    # conversions run at once, and the last cache_size results are kept in memory.
+    def __init__(self, jobs=None, max_concurrent=8, cache_size=256, max_body=16 * 1024 * 1024):
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            jobs, initializer=acrux.convert.preload, initargs=(["pdf"], ))
+        self.max_concurrent = max_concurrent
+        self.cache_size = cache_size
+        self.max_body = max_body
+        self.results = collections.OrderedDict()
+        self._limit = None
+
+    async def start(self, host, port):
+        self._limit = asyncio.Semaphore(self.max_concurrent)
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        self.pool.shutdown()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    status, content_type, data = await self.respond(method, path, headers, body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                except HTTPError as e:
+                    status, content_type, data = e.response()
+                    keep_alive = False
+
+                reason = http.HTTPStatus(status).phrase.encode()
+                writer.write(b"HTTP/1.1 %d %s\r\n" % (status, reason))
+                writer.write(b"Content-Type: %s\r\n" % content_type.encode())
+                writer.write(b"Content-Length: %d\r\n" % len(data))
+                if not keep_alive:
+                    writer.write(b"Connection: close\r\n")
+                writer.write(b"\r\n")
+                writer.write(data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        line = await read_line(reader, 400, "request line too long")
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin1").split()
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+
+        headers = {}
+        for count in itertools.count():
+            line = await read_line(reader, 431, "header line too long")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if count >= MAX_HEADERS:
+                raise HTTPError(431, "more than %d header lines" % MAX_HEADERS)
+            name, _, value = line.decode("latin1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", ""):
+            raise HTTPError(411, "chunked bodies are not supported")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "bad Content-Length")
+        if length > self.max_body:
+            raise HTTPError(413, "body exceeds %d bytes" % self.max_body)
+        body = await reader.readexactly(length)
+        return method, path, headers, body
+
+    async def respond(self, method, path, headers, body):
+        prefix, _, fmt = path.partition("?")[0].rpartition("/")
+        if (prefix != "/convert") or (fmt not in acrux.convert.FORMATS):
+            return HTTPError(404, "no such resource: %s" % path).response()
+        if method != "POST":
+            return HTTPError(405, "use POST").response()
+
+        kind = "pod" if headers.get("content-type", "").startswith("application/json") else "pn"
+        key = (fmt, kind, hashlib.sha256(body).digest())
+        data = self.results.get(key)
+        if data is None:
+            try:
+                source = body.decode("utf-8")
+                if kind == "pod":
+                    source = json.loads(source)
+            except ValueError as e:
+                return HTTPError(400, str(e)).response()
+
+            executor = self.pool if fmt == "pdf" else None
+            async with self._limit:
+                data, error = await asyncio.get_running_loop().run_in_executor(
+                    executor, render, source, fmt)
+            if error is not None:
+                return HTTPError(400, error).response()
+
+            self.results[key] = data
+            if len(self.results) > self.cache_size:
+                self.results.popitem(last=False)
+        else:
+            self.results.move_to_end(key)
+        return 200, CONTENT_TYPES[fmt], data
+
+
+async def read_line(reader, status, message):
+    # A line longer than the reader's limit (64 KiB by default) is answered with an error rather
+    # than dropping the connection.
+    try:
+        return await reader.readline()
+    except ValueError:
+        raise HTTPError(status, message)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+
+    def response(self):
+        data = json.dumps({"error": str(self)}).encode("utf-8")
+        return self.status, "application/json", data
+
+
+def render(source, fmt):
+    # Runs in a worker; errors are returned as text, since not all of them can be pickled.
+    try:
+        if isinstance(source, str):
+            # Each process has its own loader, so a source posted again for another format skips
+            # parsing if it lands on the same one.
+            ax = acrux.io.loader().load_bytes(source, "-", "pn")
+        elif isinstance(source, dict):
+            ax = acrux.load(source)
+        else:
+            return None, "expected a pod object"
+        return acrux.convert.convert(ax, fmt), None
+    except acrux.io.PuzzleLoadError as e:
+        return None, str(e)
+    except Exception as e:
+        return None, "%s: %s" % (type(e).__name__, e)
+
+
+def serve(host, port, **kwargs):
+    server = Server(**kwargs)
+
+    async def run():
+        s = await server.start(host, port)
+        async with s:
+            await s.serve_forever()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.close()
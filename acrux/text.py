@@ -15,33 +15,48 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
+import html
 import html.parser
 import re
 import unicodedata
 
 
-def strip_html(s):
-    class ToTextParser(html.parser.HTMLParser):
-        def __init__(self):
-            self.reset()
-            self.strict = False
-            self.convert_charrefs = True
-            self.data = []
+class _ToTextParser(html.parser.HTMLParser):
+    def __init__(self):
+        self.reset()
+        self.strict = False
+        self.convert_charrefs = True
+        self.data = []
+
+    def handle_data(self, d):
+        self.data.append(d)
 
-        def handle_data(self, d):
-            self.data.append(d)
+    def get_data(self):
+        return ''.join(self.data)
 
-        def get_data(self):
-            return ''.join(self.data)
 
-    p = ToTextParser()
+def _parse_html(s):
+    p = _ToTextParser()
     p.feed(s)
     return p.get_data()
 
 
-def _replace_negative(m):
-    return "-%s" % m.group(1)
+# acrux only emits <i> tags and the entities produced by html.escape(). Anything else goes through
+# the full parser.
+_ITALIC_TAG = re.compile(r"</?i>")
+_UNKNOWN_HTML = re.compile(r"<(?!/?i>)|&(?!(?:amp|lt|gt|quot|#x27);)")
+
+
+def strip_html(s):
+    if ("<" not in s) and ("&" not in s):
+        return s
+    elif _UNKNOWN_HTML.search(s):
+        return _parse_html(s)
+    return html.unescape(_ITALIC_TAG.sub("", s))
+
 
+_NEGATIVE = re.compile(r"–(\d)")
 
 _SIMPLE = {
     "“": '"',
@@ -75,13 +90,26 @@ _SIMPLE = {
 }
 
 
-def _replace_simple(m):
-    return _SIMPLE[m.group(0)]
-
+class _Transliteration(dict):
+    # A str.translate() table for the replacements that don't depend on context: _SIMPLE and emoji
+    # (skin tone modifiers are dropped). Entries are filled in as characters are seen, so the table
+    # never holds more than the characters actually used.
+    def __missing__(self, codepoint):
+        ch = chr(codepoint)
+        if ch in _SIMPLE:
+            value = _SIMPLE[ch]
+        elif 0x1F3FB <= codepoint <= 0x1F3FF:
+            value = None  # emoji skin color
+        elif (codepoint == 0x270a) or (0x1F300 <= codepoint <= 0x1F6FF) or (0x1F900 <= codepoint <=
+                                                                              0x1F9FF):
+            value = "[emoji: %s]" % unicodedata.name(ch).lower()
+        else:
+            value = codepoint
+        self[codepoint] = value
+        return value
 
-def _replace_emoji(m):
-    return "[emoji: %s]" % unicodedata.name(m.group(0)).lower()
 
+_TRANSLITERATION = _Transliteration()
 
 _MODIFIER_KEYS = {
     "⌘": "cmd",
@@ -90,11 +118,16 @@ _MODIFIER_KEYS = {
     "⌃": "ctrl",
 }
 
+# A key followed by another key gets its hyphen here, but the next key is left for its own match.
+_MODIFIER_KEY = re.compile(r"(^)?([⌘⇧⌥⌃])(?:(?=([⌘⇧⌥⌃]))|(\S))?")
+
 
 def _replace_modifier_key(m):
     s = _MODIFIER_KEYS[m.group(2)]
     if m.group(3) is not None:
-        s = "%s-%s" % (s, m.group(3))
+        s = "%s-" % s
+    elif m.group(4) is not None:
+        s = "%s-%s" % (s, m.group(4))
     if m.group(1) is not None:
         s = s.title()
     return s
@@ -115,14 +148,22 @@ _FRACTIONS = {
     "⅞": "7/8",
 }
 
+_FRACTION = re.compile(r"[⅓⅔⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞]")
 
-def _replace_fraction(m):
-    s = _FRACTIONS[m.group(2)]
-    if m.group(1) is not None:
-        s = "%s %s" % (m.group(1), s)
-    if m.group(3) is not None:
-        s = "%s %s" % (s, m.group(3))
-    return s
+
+def _replace_fractions(s):
+    # Fractions are spaced off from neighboring non-space characters. Between two adjacent
+    # fractions, the first one supplies the space.
+    def replace(m):
+        i = m.start()
+        r = _FRACTIONS[m.group(0)]
+        if (i > 0) and not (s[i - 1].isspace() or (s[i - 1] in _FRACTIONS)):
+            r = " %s" % r
+        if ((i + 1) < len(s)) and not s[i + 1].isspace():
+            r = "%s " % r
+        return r
+
+    return _FRACTION.sub(replace, s)
 
 
 _ACCENT_MAP = {
@@ -130,9 +171,22 @@ _ACCENT_MAP = {
     "ł": "l",
 }
 
+_ACCENTED = re.compile(r"([\u0100-\u02af])([\u0300-\u036f]*)|.[\u0300-\u036f]+")
+
 
 def _replace_accented(m):
-    s = unicodedata.normalize("NFKD", m.group(0))
+    if m.group(1) is None:
+        return _accented(m.group(0))
+    # A precomposed letter is transliterated first; any marks after it then attach to the result.
+    s = _accented(m.group(1))
+    if m.group(2):
+        s = s[:-1] + _accented(s[-1] + m.group(2))
+    return s
+
+
+@functools.lru_cache(maxsize=4096)
+def _accented(s):
+    s = unicodedata.normalize("NFKD", s)
     s = "".join(_ACCENT_MAP.get(ch, ch) for ch in s)
     start = 0
     result = []
@@ -153,24 +207,14 @@ def _replace_accented(m):
     return s
 
 
-_SUBS = [
-    (re.compile(r"–(\d)"), _replace_negative),
-    (re.compile(r"[“”ʺ‘’ʹʻʼ–—…№←⇐⇒→Œœ₀₁₂₃₄₅₆₇₈₉]"), _replace_simple),
-    (re.compile(r"[\U0001F3FB-\U0001F3FF]"), lambda m: ""),  # emoji skin color
-    (re.compile(r"[\u270a\U0001F300-\U0001F6FF\U0001F900-\U0001F9FF]"), _replace_emoji),
-    (re.compile(r"(^)?([⌘⇧⌥⌃])(\S)?"), _replace_modifier_key),
-    (re.compile(r"(\S)?([⅓⅔⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞])(\S)?"), _replace_fraction),
-    (re.compile(r"[\u0100-\u02af]|.[\u0300-\u036f]+"), _replace_accented),
-    (re.compile(r"π"), lambda m: "pi"),
-]
-
-
 def to_latin1(s):
-    for r, repl in _SUBS:
-        while True:
-            m = r.search(s)
-            if not m:
-                break
-            s = s[:m.start()] + repl(m) + s[m.end():]
+    # Each step is a single left-to-right pass. The order matters: "–" before a digit is a minus
+    # sign, not a dash, and accents are stripped only after the other replacements have run.
+    s = _NEGATIVE.sub(r"-\1", s)
+    s = s.translate(_TRANSLITERATION)
+    s = _MODIFIER_KEY.sub(_replace_modifier_key, s)
+    s = _replace_fractions(s)
+    s = _ACCENTED.sub(_replace_accented, s)
+    s = s.replace("π", "pi")
     s.encode("latin1")  # Assert encodable
     return s
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ctypes
+import ctypes.util
+import glob
+import os
+import select
+import struct
+import sys
+import time
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_EVENT = struct.Struct("iIII")
+
+# Editors tend to save with a burst of events (write, rename, chmod). After the first event, keep
+# reading until things go quiet for this long, and report the burst as one batch.
+_SETTLE = 0.05
+
+
+# Returns an iterator over batches of .pn files in `path` that changed. Uses inotify where
+# available; otherwise, or if `poll` is given, checks every `poll` seconds. Changes are tracked
+# from the time of the call, not from the first next().
+def changes(path, poll=None):
+    if poll is None:
+        fd = _inotify(path)
+        if fd is not None:
+            return _inotify_changes(fd, path)
+        poll = 1.0
+    return _poll_changes(path, poll, _snapshot(path))
+
+
+def _inotify(path):
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+    fd = inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        return None
+    if inotify_add_watch(fd, os.fsencode(path), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _inotify_changes(fd, path):
+    try:
+        while True:
+            changed = set()
+            timeout = None
+            while select.select([fd], [], [], timeout)[0]:
+                events = os.read(fd, 65536)
+                pos = 0
+                while pos < len(events):
+                    _, _, _, size = _EVENT.unpack_from(events, pos)
+                    pos += _EVENT.size
+                    name = os.fsdecode(events[pos:pos + size].rstrip(b"\0"))
+                    pos += size
+                    if name.endswith(".pn"):
+                        changed.add(os.path.join(path, name))
+                timeout = _SETTLE
+            if changed:
+                yield sorted(changed)
+    finally:
+        os.close(fd)
+
+
+def _poll_changes(path, interval, seen):
+    while True:
+        time.sleep(interval)
+        current = _snapshot(path)
+        changed = sorted(p for p, stat in current.items() if seen.get(p) != stat)
+        seen = current
+        if changed:
+            yield changed
+
+
+def _snapshot(path):
+    snapshot = {}
+    for p in glob.glob(os.path.join(path, "*.pn")):
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        snapshot[p] = (st.st_mtime_ns, st.st_size)
+    return snapshot
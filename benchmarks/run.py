@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import glob
+import io
+import json
+import os
+import pickle
+import platform
+import procyon
+import subprocess
+import sys
+import timeit
+from reportlab.pdfgen import canvas
+from . import synthetic
+from .context import acrux
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = [25, 50, 100]
+BENCHMARKS = []
+
+# Entry points whose cold-start import time is measured.
+STARTUP = ["acrux.bin.ax2puz", "acrux.bin.ax2ipuz", "acrux.bin.ax2pdf", "acrux.bin.cli"]
+
+
+def benchmark(name, fixtures_only=False):
+    def register(fn):
+        BENCHMARKS.append((name, fn, fixtures_only))
+        return fn
+
+    return register
+
+
+@benchmark("load")
+def bench_load(pods, axes):
+    return lambda: [acrux.load(pod) for pod in pods]
+
+
+@benchmark("load_pickled")
+def bench_load_pickled(pods, axes):
+    # What a warm acrux.cache.load() costs in place of the above, less the read of its entry.
+    blobs = [pickle.dumps(ax, pickle.HIGHEST_PROTOCOL) for ax in axes]
+    return lambda: [pickle.loads(blob) for blob in blobs]
+
+
+@benchmark("load_grid")
+def bench_load_grid(pods, axes):
+    return lambda: [acrux._load_grid(pod["grid"], pod.get("subs", {})) for pod in pods]
+
+
+@benchmark("find_answers")
+def bench_find_answers(pods, axes):
+    grids = [ax.grid for ax in axes]
+    return lambda: [acrux._find_answers(grid) for grid in grids]
+
+
+@benchmark("replace_variables")
+def bench_replace_variables(pods, axes):
+    work = []
+    for pod, ax in zip(pods, axes):
+        variables = acrux._map_variables(list(ax.clues.values()))
+        for clue in pod.get("clues", {}).values():
+            for text in (clue if isinstance(clue, list) else [clue]):
+                work.append((text, variables))
+    return lambda: [acrux._replace_variables(text, variables) for text, variables in work]
+
+
+@benchmark("to_latin1")
+def bench_to_latin1(pods, axes):
+    texts = [clue.text for ax in axes for clue in ax.clues.values() if clue.text is not None]
+    return lambda: [acrux.text.to_latin1(text) for text in texts]
+
+
+@benchmark("strip_html")
+def bench_strip_html(pods, axes):
+    texts = [clue.text for ax in axes for clue in ax.clues.values() if clue.text is not None]
+    return lambda: [acrux.text.strip_html(text) for text in texts]
+
+
+@benchmark("strip_html_parser")
+def bench_strip_html_parser(pods, axes):
+    # The general HTMLParser path that strip_html() falls back to, for comparison.
+    texts = [clue.text for ax in axes for clue in ax.clues.values() if clue.text is not None]
+    return lambda: [acrux.text._parse_html(text) for text in texts]
+
+
+@benchmark("ax2puz")
+def bench_ax2puz(pods, axes):
+    return lambda: [acrux.bin.ax2puz.dumps_puz(ax) for ax in axes]
+
+
+@benchmark("puz2ax")
+def bench_puz2ax(pods, axes):
+    data = [acrux.bin.ax2puz.dumps_puz(ax) for ax in axes]
+    return lambda: [acrux.bin.puz2ax.puz2ax(d) for d in data]
+
+
+@benchmark("ax2ipuz")
+def bench_ax2ipuz(pods, axes):
+    return lambda: [
+        acrux.bin.ax2ipuz.dumps_ipuz(acrux.bin.ax2ipuz.to_ipuz(ax), indent=2) for ax in axes
+    ]
+
+
+@benchmark("ax2pdf", fixtures_only=True)
+def bench_ax2pdf(pods, axes):
+    # The page layout only fits puzzles of ordinary size, so the large grids are covered by
+    # pdf_grid alone.
+    return lambda: [acrux.bin.ax2pdf.to_pdf(ax) for ax in axes]
+
+
+@benchmark("pdf_grid")
+def bench_pdf_grid(pods, axes):
+    def draw():
+        for ax in axes:
+            grid = acrux.bin.ax2pdf.CrosswordGrid(ax)
+            c = canvas.Canvas(io.BytesIO(), pagesize=(grid.width, grid.height))
+            grid.drawOn(c, 0, 0)
+            c.save()
+
+    return draw
+
+
+@benchmark("pdf_outline")
+def bench_pdf_outline(pods, axes):
+    # Grids of the same sizes, but full of holes, so there are many outlines to trace.
+    holes = [
+        acrux.load(synthetic.pod(ax.width, seed=i, hole_rate=0.25)) for i, ax in enumerate(axes)
+    ]
+
+    def draw():
+        for ax in holes:
+            grid = acrux.bin.ax2pdf.CrosswordGrid(ax)
+            grid.canv = canvas.Canvas(io.BytesIO(), pagesize=(grid.width, grid.height))
+            grid._draw_lines()
+
+    return draw
+
+
+def corpora(sizes):
+    pods = []
+    for path in sorted(glob.glob("%s/test/data/acrux/*.pn" % ROOT)):
+        with open(path) as f:
+            pods.append(procyon.load(f))
+    yield "fixtures", pods
+    for size in sizes:
+        yield "synthetic-%d" % size, [synthetic.pod(size, seed=seed) for seed in range(2)]
+
+
+def measure(fn, repeat):
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def startup(module, repeat):
+    # The cumulative import time of `module` in a fresh interpreter, as reported by -X importtime,
+    # in seconds.
+    best = None
+    for _ in range(repeat):
+        p = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                            "import %s" % module],
+                           cwd=ROOT,
+                           stdout=subprocess.DEVNULL,
+                           stderr=subprocess.PIPE,
+                           check=True)
+        for line in p.stderr.decode().splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line.split("|")
+            if (len(fields) == 3) and (fields[2].strip() == module):
+                micros = int(fields[1])
+        best = micros if best is None else min(best, micros)
+    return best / 1e6
+
+
+def main(args=None):
+    args = args or sys.argv[:]
+    parser = argparse.ArgumentParser(prog=args.pop(0))
+    parser.add_argument("-o", "--output", metavar="OUT.json", help="write results here")
+    parser.add_argument(
+        "-b", "--baseline", metavar="BASE.json", help="compare against earlier results")
+    parser.add_argument(
+        "--max-slowdown",
+        metavar="RATIO",
+        type=float,
+        default=1.25,
+        help="fail if any benchmark is this many times slower than the baseline")
+    parser.add_argument("-k", "--filter", metavar="NAME", help="only run benchmarks matching NAME")
+    parser.add_argument(
+        "--sizes",
+        metavar="N",
+        type=int,
+        nargs="*",
+        default=SIZES,
+        help="synthetic grid sizes to run (default: %s)" % " ".join(str(s) for s in SIZES))
+    parser.add_argument("--repeat", metavar="N", type=int, default=5, help="timing repeats")
+    opts = parser.parse_args(args)
+
+    results = {}
+    for corpus, pods in corpora(opts.sizes):
+        axes = [acrux.load(pod) for pod in pods]
+        for name, setup, fixtures_only in BENCHMARKS:
+            key = "%s/%s" % (name, corpus)
+            if (opts.filter and (opts.filter not in key)) or (fixtures_only and
+                                                              (corpus != "fixtures")):
+                continue
+            results[key] = measure(setup(pods, axes), opts.repeat)
+            print("%-32s %12.3f ms" % (key, results[key] * 1000), file=sys.stderr)
+    for module in STARTUP:
+        key = "startup/%s" % module
+        if opts.filter and (opts.filter not in key):
+            continue
+        results[key] = startup(module, opts.repeat)
+        print("%-32s %12.3f ms" % (key, results[key] * 1000), file=sys.stderr)
+
+    report = {
+        "acrux": acrux.__version__,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if opts.output:
+        with open(opts.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+
+    if opts.baseline:
+        with open(opts.baseline) as f:
+            baseline = json.load(f)["results"]
+        slow = False
+        for key, seconds in sorted(results.items()):
+            if key not in baseline:
+                continue
+            ratio = seconds / baseline[key]
+            if ratio > opts.max_slowdown:
+                print("%s: %.2fx slower than baseline" % (key, ratio), file=sys.stderr)
+                slow = True
+        if slow:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import procyon
+import random
+import string
+from .context import acrux
+
+# Substitutions scattered through generated grids. Together they cover circles, rebuses with and
+# without alternate options, a non-ASCII key, and multi-character keys that share a prefix with a
+# shorter key (so the longest match has to win).
+SUBS = {
+    "@": ["AT", "@"],
+    "&": ["AND", "&"],
+    "♥": "HEART",
+    "%%": {
+        "text": "PER",
+        "style": "circle"
+    },
+    "##": {
+        "block": True
+    },
+}
+SUBS.update({c: {"text": c.upper(), "style": "circle"} for c in string.ascii_lowercase})
+
+WORDS = """
+    alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike november
+    oscar papa quebec romeo sierra tango uniform victor whiskey xray yankee zulu
+""".split()
+
+# Text that acrux.text.to_latin1 has to transliterate.
+UNICODE = [
+    "“quoted”", "it’s", "1⅓ cups", "ca. 1850–1900", "Dvořak", "Cœur d’Alène", "⌘Z",
+    "\U0001F525"
+]
+
+
+def pod(width,
+        height=None,
+        seed=0,
+        density=0.16,
+        sub_rate=0.05,
+        duplicate_rate=0.1,
+        hole_rate=0.0):
+    # Returns a pod that acrux.load() accepts, with a clue for every entry. Clue text leans on
+    # every feature of the markup language; entries that occur more than once get a list of clues,
+    # and references to them use the ANSWER[i] form. `hole_rate` leaves squares out of the grid
+    # entirely, as in variety shapes.
+    height = height or width
+    rand = random.Random(seed)
+    sub_keys = sorted(k for k in SUBS if k != "##")
+
+    rows = []
+    for _ in range(height):
+        row = []
+        for _ in range(width):
+            roll = rand.random()
+            if roll < density:
+                # Two adjacent "#" would read as one "##" cell and shorten the row.
+                row.append("##" if (row and row[-1] == "#") else rand.choice(["#", "#", "##"]))
+            elif roll < (density + sub_rate):
+                row.append(rand.choice(sub_keys))
+            elif roll < (density + sub_rate + hole_rate):
+                row.append(" ")
+            else:
+                row.append(rand.choice(string.ascii_uppercase))
+        rows.append(row)
+    _duplicate_runs(rows, rand, duplicate_rate)
+
+    grid = "".join("".join(row) + "\n" for row in rows)
+    ax = acrux.load({"grid": grid, "subs": SUBS})
+
+    counts = {}
+    for answer, i in ax.clues:
+        counts[answer] = max(counts.get(answer, 0), i + 1)
+    names = sorted(
+        answer if count == 1 else "%s[%d]" % (answer, i)
+        for answer, count in counts.items() for i in range(count))
+
+    clues = {}
+    for answer, count in sorted(counts.items()):
+        texts = [_clue(rand, names) for _ in range(count)]
+        clues[answer] = texts[0] if count == 1 else texts
+
+    return {
+        "title": "Synthetic %dx%d #%d" % (width, height, seed),
+        "author": "acrux",
+        "copyright": "",
+        "grid": grid,
+        "subs": SUBS,
+        "clues": clues,
+    }
+
+
+def source(*args, **kwargs):
+    return procyon.dumps(pod(*args, **kwargs))
+
+
+def _duplicate_runs(rows, rand, rate):
+    # Copy some across entries over later ones of the same length, so that answers repeat.
+    seen = {}
+    for row in rows:
+        x = 0
+        while x < len(row):
+            if row[x] in ("#", "##"):
+                x += 1
+                continue
+            end = x
+            while (end < len(row)) and (row[end] not in ("#", "##")):
+                end += 1
+            length = end - x
+            if length > 1:
+                if (length in seen) and (rand.random() < rate):
+                    row[x:end] = seen[length]
+                else:
+                    seen.setdefault(length, row[x:end])
+            x = end
+
+
+def _clue(rand, names):
+    parts = []
+    for _ in range(rand.randint(2, 6)):
+        roll = rand.random()
+        if (roll < 0.2) and names:
+            parts.append("$%s" % rand.choice(names))
+        elif (roll < 0.3) and (len(names) > 1):
+            refs = rand.sample(names, min(len(names), rand.randint(2, 4)))
+            parts.append("${%s}" % rand.choice([" & ", " | "]).join(refs))
+        elif roll < 0.45:
+            parts.append("*%s*" % " ".join(rand.sample(WORDS, 2)))
+        elif roll < 0.55:
+            parts.append(rand.choice([r"\*", r"\$", "$$", r"\\", "<&>"]))
+        elif roll < 0.65:
+            parts.append(rand.choice(UNICODE))
+        else:
+            parts.append(rand.choice(WORDS))
+    return " ".join(parts)
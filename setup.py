@@ -15,6 +15,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import re
 from setuptools import setup, find_packages
 
 assert str is not bytes  # Python3 required
@@ -25,21 +26,27 @@ with open("README.md") as f:
 with open("LICENSE") as f:
     license = f.read()
 
+with open("acrux/__init__.py") as f:
+    version = re.search(r'^__version__ = "(.*)"$', f.read(), re.M).group(1)
+
 setup(
     name="acrux",
-    version="0.0.0",
+    version=version,
     description="Acrux Crossword Tools",
     long_description=readme,
     author="Chris Pickel",
     author_email="sfiera@twotaled.com",
     url="https://github.com/sfiera/acrux",
     license=license,
-    python_requires='>=3.0',
-    packages=find_packages(exclude=("test", )),
+    python_requires='>=3.7',
+    packages=find_packages(exclude=("test", "benchmarks")),
     entry_points={
         "console_scripts": [
+            "acrux=acrux.bin.cli:main",
             "ax2ipuz=acrux.bin.ax2ipuz:main",
             "ax2pdf=acrux.bin.ax2pdf:main",
             "ax2puz=acrux.bin.ax2puz:main",
+            "ipuz2ax=acrux.bin.ipuz2ax:main",
+            "puz2ax=acrux.bin.puz2ax:main",
         ],
     })
@@ -20,6 +20,7 @@ import os
 import sys
 from io import StringIO
 from .context import acrux
+import acrux.bin.ax2ipuz
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 ACRUX = [os.path.basename(p) for p in glob.glob("%s/test/data/acrux/*" % ROOT)]
@@ -34,7 +35,7 @@ def test_ax2ipuz(case):
 
     sys.stdin = StringIO(source)
     sys.stdout = StringIO()
-    acrux.bin.ax2ipuz.main(["ax2ipuz"])
+    acrux.bin.ax2ipuz.main(["ax2ipuz", "--no-cache"])
     actual = sys.stdout.getvalue()
     sys.stdin = sys.__stdin__
     sys.stdout = sys.__stdout__
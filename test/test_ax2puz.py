@@ -20,6 +20,7 @@ import os
 import sys
 from io import BytesIO, StringIO
 from .context import acrux
+import acrux.bin.ax2puz
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 ACRUX = [os.path.basename(p) for p in glob.glob("%s/test/data/acrux/*" % ROOT)]
@@ -34,7 +35,7 @@ def test_ax2puz(case):
 
     sys.stdin = StringIO(source)
     sys.stdout = BytesIO()
-    acrux.bin.ax2puz.main(["ax2puz"])
+    acrux.bin.ax2puz.main(["ax2puz", "--no-cache"])
     actual = sys.stdout.getvalue()
     sys.stdin = sys.__stdin__
     sys.stdout = sys.__stdout__
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import os
+import pytest
+import sys
+import tarfile
+import zipfile
+from io import BytesIO, StringIO
+from .context import acrux
+import acrux.bin.ax2ipuz
+import acrux.bin.ax2puz
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+ACRUX = [os.path.basename(p) for p in glob.glob("%s/test/data/acrux/*" % ROOT)]
+CASES = sorted(os.path.splitext(ax)[0] for ax in ACRUX)
+
+
+def source(case):
+    with open("%s/test/data/acrux/%s.pn" % (ROOT, case)) as f:
+        return f.read()
+
+
+def expected(case, fmt):
+    with open("%s/test/data/%s/%s.%s" % (ROOT, fmt, case, fmt), "rb") as f:
+        return f.read()
+
+
+def concatenated():
+    return "---\n".join(source(case) for case in CASES)
+
+
+def test_stdin_zip(tmpdir, monkeypatch):
+    monkeypatch.setattr(sys, "stdin", StringIO(concatenated()))
+    archive = tmpdir.join("out.zip")
+    acrux.bin.ax2puz.main(["ax2puz", "--no-cache", "-o", "{index:02d}.{fmt}", "-a", str(archive)])
+
+    with zipfile.ZipFile(str(archive)) as z:
+        names = ["%02d.puz" % (i + 1) for i in range(len(CASES))]
+        assert z.namelist() == names + ["manifest.json"]
+        for i, case in enumerate(CASES):
+            assert z.read("%02d.puz" % (i + 1)) == expected(case, "puz")
+
+
+def test_tar_stream(tmpdir, monkeypatch):
+    tmpdir.join("pair.pn").write(source(CASES[0]) + "---\n" + source(CASES[1]))
+    tmpdir.join("one.pn").write(source(CASES[2]))
+    stdout = BytesIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+    acrux.bin.ax2puz.main([
+        "ax2puz", "--no-cache", "-a", "-",
+        str(tmpdir.join("pair.pn")),
+        str(tmpdir.join("one.pn"))
+    ])
+
+    with tarfile.open(fileobj=BytesIO(stdout.getvalue())) as tar:
+        assert tar.getnames() == ["pair.puz", "pair-2.puz", "one.puz", "manifest.json"]
+        assert tar.extractfile("pair-2.puz").read() == expected(CASES[1], "puz")
+
+
+def test_template(tmpdir, monkeypatch):
+    monkeypatch.setattr(sys, "stdin", StringIO(concatenated()))
+    acrux.bin.ax2ipuz.main(
+        ["ax2ipuz", "--no-cache", "-o",
+         str(tmpdir.join("out", "{name}.{fmt}"))])
+
+    assert tmpdir.join("out", "stdin.ipuz").read_binary() == expected(CASES[0], "ipuz")
+    assert tmpdir.join("out", "stdin-2.ipuz").read_binary() == expected(CASES[1], "ipuz")
+
+
+def test_ipuz_stdout(monkeypatch):
+    monkeypatch.setattr(sys, "stdin", StringIO(concatenated()))
+    stdout = StringIO()
+    monkeypatch.setattr(sys, "stdout", stdout)
+    acrux.bin.ax2ipuz.main(["ax2ipuz", "--no-cache"])
+
+    ipuzs = [expected(case, "ipuz").decode("utf-8") for case in CASES]
+    assert stdout.getvalue() == "".join(ipuzs)
+
+
+def test_binary_stdout(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "stdin", StringIO(concatenated()))
+    monkeypatch.setattr(sys, "stdout", BytesIO())
+    with pytest.raises(SystemExit) as e:
+        acrux.bin.ax2puz.main(["ax2puz", "--no-cache"])
+    assert e.value.code == 1
+    assert "--archive" in capsys.readouterr().err
+
+
+def test_legacy_output(tmpdir):
+    output = tmpdir.join("out.puz")
+    acrux.bin.ax2puz.main(
+        ["ax2puz", "--no-cache",
+         "%s/test/data/acrux/%s.pn" % (ROOT, CASES[0]),
+         str(output)])
+    assert output.read_binary() == expected(CASES[0], "puz")
+
+
+def test_legacy_output_name(tmpdir, monkeypatch):
+    # Neither the output's extension nor its existence make it a second source.
+    output = tmpdir.join("out.json")
+    monkeypatch.setattr(sys, "stdout", StringIO())
+    acrux.bin.ax2ipuz.main(
+        ["ax2ipuz", "--no-cache",
+         "%s/test/data/acrux/%s.pn" % (ROOT, CASES[0]),
+         str(output)])
+    assert output.read_binary() == expected(CASES[0], "ipuz")
+    assert sys.stdout.getvalue() == ""
+
+    acrux.bin.ax2ipuz.main(
+        ["ax2ipuz", "--no-cache",
+         "%s/test/data/acrux/%s.pn" % (ROOT, CASES[1]),
+         str(output)])
+    assert output.read_binary() == expected(CASES[1], "ipuz")
+
+
+def test_failure(tmpdir, capsys):
+    tmpdir.join("mixed.pn").write("grid: \"#\"\nclues:\n\tNOPE: \"Not in grid\"\n---\n" +
+                                  source(CASES[0]))
+    with pytest.raises(SystemExit) as e:
+        acrux.bin.ax2puz.main([
+            "ax2puz", "--no-cache", "-o",
+            str(tmpdir.join("{name}.{fmt}")),
+            str(tmpdir.join("mixed.pn"))
+        ])
+    assert e.value.code == 1
+    assert "mixed.pn" in capsys.readouterr().err
+    assert not tmpdir.join("mixed.puz").exists()
+    assert tmpdir.join("mixed-2.puz").read_binary() == expected(CASES[0], "puz")
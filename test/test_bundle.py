@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import pytest
+import tarfile
+import zipfile
+from io import BytesIO
+from .context import acrux
+import acrux.bundle
+
+FILES = [
+    ("a.puz", b"ACROSS&DOWN\0" * 20),
+    ("a.pdf", b"%PDF-1.4\n" * 20),
+    ("b.ipuz", b"{}"),
+]
+
+
+def manifest(data):
+    return json.loads(data.decode("utf-8"))["files"]
+
+
+def test_zip():
+    f = BytesIO()
+    with acrux.bundle.Bundle(f, "zip") as bundle:
+        for name, data in FILES:
+            bundle.add(name, data)
+
+    with zipfile.ZipFile(BytesIO(f.getvalue())) as z:
+        assert z.namelist() == [name for name, _ in FILES] + ["manifest.json"]
+        for name, data in FILES:
+            assert z.read(name) == data
+        assert z.getinfo("a.puz").compress_type == zipfile.ZIP_DEFLATED
+        assert z.getinfo("a.pdf").compress_type == zipfile.ZIP_STORED
+        assert manifest(z.read("manifest.json")) == [{
+            "name": name,
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest()
+        } for name, data in FILES]
+
+
+@pytest.mark.parametrize("suffix", [".tar", ".tar.gz", ".tgz", ".tar.xz"])
+def test_tar(tmpdir, suffix):
+    path = str(tmpdir.join("out" + suffix))
+    with acrux.bundle.create(path) as bundle:
+        for name, data in FILES:
+            bundle.add(name, data)
+
+    with tarfile.open(path) as tar:
+        assert tar.getnames() == [name for name, _ in FILES] + ["manifest.json"]
+        for name, data in FILES:
+            assert tar.extractfile(name).read() == data
+        assert len(manifest(tar.extractfile("manifest.json").read())) == len(FILES)
+
+
+def test_duplicate():
+    bundle = acrux.bundle.Bundle(BytesIO(), "zip")
+    bundle.add("a.puz", b"")
+    with pytest.raises(ValueError):
+        bundle.add("a.puz", b"")
+    with pytest.raises(ValueError):
+        bundle.add("manifest.json", b"")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+import procyon
+from .context import acrux
+import acrux.cache
+import acrux.convert
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+
+
+def test_hit_and_miss(tmpdir):
+    cache = acrux.cache.Cache(str(tmpdir))
+    assert cache.get("grid: \"A\"\n", "puz") is None
+    cache.put("grid: \"A\"\n", "puz", b"data")
+    assert cache.get("grid: \"A\"\n", "puz") == b"data"
+    assert cache.get(b"grid: \"A\"\n", "puz") == b"data"
+    assert cache.get("grid: \"A\"\n", "pdf") is None
+    assert cache.get("grid: \"B\"\n", "puz") is None
+
+    cache.put({"grid": "A"}, "puz", b"pod")
+    assert cache.get({"grid": "A"}, "puz") == b"pod"
+
+
+def test_eviction(tmpdir):
+    cache = acrux.cache.Cache(str(tmpdir), max_size=1000)
+    for i in range(10):
+        cache.put(str(i), "pdf", b"x" * 200)
+        assert cache.get("0", "pdf") is not None  # Kept fresh by use.
+    assert cache.get("0", "pdf") is not None
+    assert cache.get("9", "pdf") is not None
+    assert sum(cache.get(str(i), "pdf") is not None for i in range(10)) <= 5
+
+
+def test_read_only(tmpdir, monkeypatch):
+    cache = acrux.cache.Cache(str(tmpdir))
+    cache.put("grid: \"A\"\n", "puz", b"data")
+
+    def utime(path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(os, "utime", utime)
+    assert cache.get("grid: \"A\"\n", "puz") == b"data"
+
+
+def test_size_file(tmpdir, monkeypatch):
+    acrux.cache.Cache(str(tmpdir)).put("0", "pdf", b"x" * 200)
+    assert tmpdir.join("size").read() == "200\n"
+
+    # Later processes keep count without scanning the cache.
+    def walk(path):
+        raise AssertionError("cache scanned")
+
+    monkeypatch.setattr(os, "walk", walk)
+    acrux.cache.Cache(str(tmpdir)).put("1", "pdf", b"x" * 100)
+    assert tmpdir.join("size").read() == "300\n"
+    assert acrux.cache.Cache(str(tmpdir)).get("0", "pdf") == b"x" * 200
+
+
+def test_code_version(tmpdir, monkeypatch):
+    cache = acrux.cache.Cache(str(tmpdir))
+    cache.put("grid: \"A\"\n", "puz", b"data")
+    monkeypatch.setattr(acrux.cache, "_code_version", "changed")
+    assert cache.get("grid: \"A\"\n", "puz") is None
+
+
+def test_convert_pod(tmpdir):
+    cache = acrux.cache.Cache(str(tmpdir))
+    pod = {"grid": "ZONES\n", "clues": {"ZONES": "Areas"}}
+    data = acrux.convert.convert_pod(pod, "ipuz", cache)
+    assert cache.get(pod, "ipuz") == data
+    assert acrux.convert.convert_pod(pod, "ipuz") == data
+
+
+def test_loaded(tmpdir):
+    cache = acrux.cache.Cache(str(tmpdir))
+    with open("%s/test/data/acrux/heart.pn" % ROOT) as f:
+        source = f.read()
+    parsed = []
+
+    def parse(source):
+        parsed.append(source)
+        return procyon.load(io.StringIO(source))
+
+    ax = acrux.cache.load(source, parse, cache)
+    again = acrux.cache.load(source.encode("utf-8"), parse, cache)
+    assert len(parsed) == 1
+    assert again is not ax
+    assert acrux.convert.convert(again, "puz") == acrux.convert.convert(ax, "puz")
+    assert [c.rich for c in again.clues.values()] == [c.rich for c in ax.clues.values()]
+    for row, again_row in zip(ax.grid, again.grid):
+        for cell, again_cell in zip(row, again_row):
+            assert (cell.text, cell.style, cell.number) == (again_cell.text, again_cell.style,
+                                                            again_cell.number)
+            if cell.across:
+                assert again_cell.across in again.clues.values()
+                assert again_cell.across.number == cell.across.number
+
+    # The same bytes parsed as another kind are another entry.
+    assert cache.get_loaded(source, "ipuz") is None
+
+    # An entry that doesn't unpickle is a miss, and is replaced.
+    cache.put(source, acrux.cache.LOADED + ".pn", acrux.cache.LOADED_HEADER + b"garbage")
+    assert cache.get_loaded(source) is None
+    acrux.cache.load(source, parse, cache)
+    assert len(parsed) == 2
+    assert cache.get_loaded(source) is not None
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import json
+import os
+import pytest
+import subprocess
+import sys
+import zipfile
+from .context import acrux
+import acrux.bin.cli
+import acrux.io
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+ACRUX = [os.path.basename(p) for p in glob.glob("%s/test/data/acrux/*" % ROOT)]
+CASES = [os.path.splitext(ax)[0] for ax in ACRUX]
+
+
+def test_convert(tmpdir):
+    acrux.bin.cli.main([
+        "acrux", "convert", "--no-cache", "-f", "puz", "-f", "ipuz", "-o",
+        str(tmpdir),
+        "%s/test/data/acrux" % ROOT
+    ])
+
+    for case in CASES:
+        with open("%s/test/data/puz/%s.puz" % (ROOT, case), "rb") as f:
+            assert f.read() == tmpdir.join("%s.puz" % case).read_binary()
+        with open("%s/test/data/ipuz/%s.ipuz" % (ROOT, case), "rb") as f:
+            assert f.read() == tmpdir.join("%s.ipuz" % case).read_binary()
+        assert not tmpdir.join("%s.pdf" % case).exists()
+
+
+def test_convert_parallel(tmpdir):
+    acrux.bin.cli.main([
+        "acrux", "convert", "--no-cache", "-j", "4", "-f", "ipuz", "-o",
+        str(tmpdir),
+        "%s/test/data/acrux" % ROOT
+    ])
+
+    for case in CASES:
+        with open("%s/test/data/ipuz/%s.ipuz" % (ROOT, case), "rb") as f:
+            assert f.read() == tmpdir.join("%s.ipuz" % case).read_binary()
+
+
+def test_convert_failure(tmpdir, capsys):
+    tmpdir.join("bad.pn").write("grid: \"#\"\nclues:\n\tNOPE: \"Not in grid\"\n")
+    tmpdir.join("good.pn").write(open("%s/test/data/acrux/heart.pn" % ROOT).read())
+
+    with pytest.raises(SystemExit) as e:
+        acrux.bin.cli.main(
+            ["acrux", "convert", "--no-cache", "-f", "ipuz",
+             str(tmpdir.join("*.pn"))])
+    assert e.value.code == 1
+    assert "bad.pn" in capsys.readouterr().err
+    assert tmpdir.join("good.ipuz").exists()
+    assert not tmpdir.join("bad.ipuz").exists()
+
+
+def test_convert_bundle(tmpdir):
+    bundle = tmpdir.join("bundle.zip")
+    acrux.bin.cli.main([
+        "acrux", "convert", "--no-cache", "-j", "2", "--bundle",
+        str(bundle),
+        "%s/test/data/acrux" % ROOT
+    ])
+
+    with zipfile.ZipFile(str(bundle)) as z:
+        for case in CASES:
+            with open("%s/test/data/puz/%s.puz" % (ROOT, case), "rb") as f:
+                assert f.read() == z.read("%s.puz" % case)
+            with open("%s/test/data/ipuz/%s.ipuz" % (ROOT, case), "rb") as f:
+                assert f.read() == z.read("%s.ipuz" % case)
+            assert z.read("%s.pdf" % case).startswith(b"%PDF")
+        manifest = json.loads(z.read("manifest.json").decode("utf-8"))
+        assert len(manifest["files"]) == 3 * len(CASES)
+    assert not os.path.exists("%s/test/data/acrux/%s.puz" % (ROOT, CASES[0]))
+
+
+def test_booklet_loads_once(tmpdir, monkeypatch):
+    parsed = []
+    to_pod = acrux.io.to_pod
+
+    def counting(source, kind="pn"):
+        parsed.append(kind)
+        return to_pod(source, kind)
+
+    monkeypatch.setattr(acrux.io, "to_pod", counting)
+    acrux.io.loader().clear()
+    acrux.bin.cli.main([
+        "acrux", "convert", "--no-cache", "-f", "puz", "-o",
+        str(tmpdir), "--booklet",
+        str(tmpdir.join("booklet.pdf")),
+        "%s/test/data/acrux" % ROOT
+    ])
+    assert len(parsed) == len(CASES)
+
+
+def test_convert_ipuz(tmpdir):
+    acrux.bin.cli.main([
+        "acrux", "convert", "--no-cache", "-f", "puz", "-o",
+        str(tmpdir),
+        "%s/test/data/ipuz/*.ipuz" % ROOT
+    ])
+
+    for case in CASES:
+        with open("%s/test/data/puz/%s.puz" % (ROOT, case), "rb") as f:
+            assert f.read() == tmpdir.join("%s.puz" % case).read_binary()
+
+
+def test_convert_puz(tmpdir):
+    # .puz clues are Latin-1, so only a .puz output is expected to match exactly.
+    acrux.bin.cli.main([
+        "acrux", "convert", "--no-cache", "-f", "puz", "-o",
+        str(tmpdir),
+        "%s/test/data/puz/*.puz" % ROOT
+    ])
+
+    for case in CASES:
+        with open("%s/test/data/puz/%s.puz" % (ROOT, case), "rb") as f:
+            assert f.read() == tmpdir.join("%s.puz" % case).read_binary()
+
+
+def test_convert_booklet(tmpdir):
+    booklet = tmpdir.join("booklet.pdf")
+    acrux.bin.cli.main([
+        "acrux", "convert", "--no-cache", "-f", "puz", "-o",
+        str(tmpdir), "--booklet",
+        str(booklet),
+        "%s/test/data/acrux" % ROOT
+    ])
+
+    data = booklet.read_binary()
+    assert data.startswith(b"%PDF")
+    assert data.count(b"/Type /Page\n") == len(CASES)
+
+
+def test_lazy_backends():
+    # Converting to .puz and .ipuz shouldn't load reportlab.
+    code = "\n".join([
+        "import acrux, acrux.bin.cli, acrux.convert, sys",
+        "clues = {'AB': 'a', 'CD': 'c', 'AC': 'a', 'BD': 'b'}",
+        "ax = acrux.load({'grid': 'AB\\nCD\\n', 'clues': clues})",
+        "acrux.convert.convert(ax, 'puz')",
+        "acrux.convert.convert(ax, 'ipuz')",
+        "print('reportlab' in sys.modules)",
+    ])
+    assert subprocess.check_output([sys.executable, "-c", code], cwd=ROOT).strip() == b"False"
@@ -16,9 +16,20 @@
 # limitations under the License.
 
 from .context import acrux
+import acrux.text
 
 
 def test_strip_html():
     assert acrux.text.strip_html("No HTML") == "No HTML"
     assert acrux.text.strip_html("<i>Italics</i>") == "Italics"
     assert acrux.text.strip_html("&lt;br/&gt;") == "<br/>"
+    assert acrux.text.strip_html("") == ""
+    assert acrux.text.strip_html("<i>A</i> &amp; <i>B</i>") == "A & B"
+    assert acrux.text.strip_html("&quot;Q&quot; &#x27;n&#x27; &lt;A&gt;") == "\"Q\" 'n' <A>"
+    assert acrux.text.strip_html("&amp;lt;") == "&lt;"
+
+
+def test_strip_html_fallback():
+    assert acrux.text.strip_html("<b>Bold</b> <i>and</i> <u>more</u>") == "Bold and more"
+    assert acrux.text.strip_html("Caf&eacute; &#233;") == "Café é"
+    assert acrux.text.strip_html("a<br/>b") == "ab"
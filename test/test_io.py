@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import os
+import pytest
+from .context import acrux
+import acrux.convert
+import acrux.io
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+
+
+def counting_parses(monkeypatch):
+    parsed = []
+    to_pod = acrux.io.to_pod
+
+    def counting(source, kind="pn"):
+        parsed.append(kind)
+        return to_pod(source, kind)
+
+    monkeypatch.setattr(acrux.io, "to_pod", counting)
+    return parsed
+
+
+def test_path(tmpdir, monkeypatch):
+    parsed = counting_parses(monkeypatch)
+    path = tmpdir.join("heart.pn")
+    path.write(open("%s/test/data/acrux/heart.pn" % ROOT).read())
+    loader = acrux.io.Loader()
+
+    ax = loader.load_path(str(path))
+    assert loader.load_path(str(path)) is ax
+    assert parsed == ["pn"]
+    with open("%s/test/data/puz/heart.puz" % ROOT, "rb") as f:
+        assert acrux.convert.convert(ax, "puz") == f.read()
+
+    # A rewrite is noticed through size and mtime.
+    path.write(open("%s/test/data/acrux/zones.pn" % ROOT).read())
+    os.utime(str(path), ns=(0, 0))
+    changed = loader.load_path(str(path))
+    assert changed is not ax
+    assert len(parsed) == 2
+    with open("%s/test/data/puz/zones.puz" % ROOT, "rb") as f:
+        assert acrux.convert.convert(changed, "puz") == f.read()
+
+
+def test_path_slots(tmpdir, monkeypatch):
+    # Each file takes one slot, so two fit in a loader of two.
+    parsed = counting_parses(monkeypatch)
+    loader = acrux.io.Loader(max_size=2)
+    paths = []
+    for answer in ["A", "B"]:
+        path = tmpdir.join("%s.pn" % answer)
+        path.write("grid: \"%s\"\n" % answer)
+        paths.append(str(path))
+    axes = [loader.load_path(path) for path in paths]
+    assert [loader.load_path(path) for path in paths] == axes
+    assert len(parsed) == 2
+
+
+def test_path_key(tmpdir, monkeypatch):
+    parsed = counting_parses(monkeypatch)
+    path = tmpdir.join("a.pn")
+    path.write("grid: \"A\"\n")
+    loader = acrux.io.Loader()
+
+    # A source read by the caller, with the key of the file it came from, isn't hashed, and is
+    # found again by path.
+    key = acrux.io.path_key(str(path), os.stat(str(path)))
+    monkeypatch.setattr(hashlib, "sha256", None)
+    ax = loader.load_bytes(path.read_binary(), str(path), key=key)
+    assert loader.load_path(str(path)) is ax
+    assert parsed == ["pn"]
+
+
+def test_bytes(monkeypatch):
+    parsed = counting_parses(monkeypatch)
+    with open("%s/test/data/acrux/heart.pn" % ROOT) as f:
+        source = f.read()
+    loader = acrux.io.Loader()
+
+    ax = loader.load_bytes(source)
+    assert loader.load_bytes(source.encode("utf-8")) is ax
+    assert loader.load_file(open("%s/test/data/acrux/heart.pn" % ROOT, "rb")) is ax
+    assert parsed == ["pn"]
+
+
+def test_kinds(monkeypatch):
+    parsed = counting_parses(monkeypatch)
+    loader = acrux.io.Loader()
+    puz = loader.load_path("%s/test/data/puz/heart.puz" % ROOT)
+    ipuz = loader.load_path("%s/test/data/ipuz/heart.ipuz" % ROOT)
+    assert parsed == ["puz", "ipuz"]
+    assert puz.width == ipuz.width
+
+
+def test_eviction(monkeypatch):
+    parsed = counting_parses(monkeypatch)
+    loader = acrux.io.Loader(max_size=2)
+    sources = ["grid: \"%s\"\n" % answer for answer in ["A", "B", "C"]]
+    for source in sources:
+        loader.load_bytes(source)
+    loader.load_bytes(sources[2])
+    assert len(parsed) == 3
+    loader.load_bytes(sources[0])
+    assert len(parsed) == 4
+
+
+def test_errors(tmpdir):
+    loader = acrux.io.Loader()
+    with pytest.raises(acrux.io.PuzzleLoadError) as e:
+        loader.load_path(str(tmpdir.join("missing.pn")))
+    assert isinstance(e.value.error, OSError)
+    assert str(e.value).startswith(str(tmpdir.join("missing.pn")) + ": ")
+
+    with pytest.raises(acrux.io.PuzzleLoadError) as e:
+        loader.load_bytes("grid: \"A\"\ntitle: nope\n", "bad.pn")
+    assert e.value.lineno == 2
+    assert e.value.colno is not None
+    assert str(e.value).startswith("bad.pn:2:")
+
+    with pytest.raises(acrux.io.PuzzleLoadError) as e:
+        loader.load_bytes("{\"version\": ", "bad.ipuz")
+    assert (e.value.lineno, e.value.colno) == (1, 13)
+    assert str(e.value).startswith("bad.ipuz:1:13: ")
+
+    with pytest.raises(acrux.io.PuzzleLoadError) as e:
+        loader.load_bytes("grid: \"#\"\nclues:\n\tNOPE: \"Not in grid\"\n", "nope.pn")
+    assert e.value.lineno is None
+    assert str(e.value).startswith("nope.pn: ")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import io
+import json
+import os
+import procyon
+import pytest
+import sys
+from io import StringIO
+from .context import acrux
+import acrux.bin.ax2ipuz
+import acrux.bin.ipuz2ax
+import acrux.convert
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+IPUZ = [os.path.basename(p) for p in glob.glob("%s/test/data/ipuz/*" % ROOT)]
+CASES = [os.path.splitext(ipuz)[0] for ipuz in IPUZ]
+
+
+def test_ipuz2ax(case):
+    with open("%s/test/data/ipuz/%s.ipuz" % (ROOT, case)) as f:
+        source = f.read()
+
+    sys.stdin = StringIO(source)
+    sys.stdout = StringIO()
+    acrux.bin.ipuz2ax.main(["ipuz2ax"])
+    actual = sys.stdout.getvalue()
+    sys.stdin = sys.__stdin__
+    sys.stdout = sys.__stdout__
+
+    pod = procyon.load(StringIO(actual))
+    ipuz = acrux.bin.ax2ipuz.ax2ipuz(pod)
+    assert acrux.bin.ax2ipuz.dumps_ipuz(ipuz, indent=2) == source
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 12, 14, 16, 18, 64, 65536])
+def test_iter_ipuz(chunk_size):
+    sources = []
+    for case in sorted(CASES):
+        with open("%s/test/data/ipuz/%s.ipuz" % (ROOT, case)) as f:
+            sources.append(f.read())
+    stream = io.StringIO("".join(sources) + "ipuz(%s);\n" % sources[0])
+    docs = list(acrux.bin.ipuz2ax.iter_ipuz(stream, chunk_size=chunk_size))
+    assert docs == [json.loads(s) for s in sources + sources[:1]]
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 48))
+def test_iter_ipuz_wrapped(chunk_size):
+    stream = io.StringIO("ipuz({\"a\": 1});\nipuz({\"b\": [1,2,3]}) ;\n{\"c\":2}")
+    docs = list(acrux.bin.ipuz2ax.iter_ipuz(stream, chunk_size=chunk_size))
+    assert docs == [{"a": 1}, {"b": [1, 2, 3]}, {"c": 2}]
+
+
+def test_missing_clues():
+    with open("%s/test/data/ipuz/zones.ipuz" % ROOT) as f:
+        ipuz = json.load(f)
+    across = ipuz["clues"]["Across"]
+    del across[0]
+    across[0] = {"number": "1-5", "clue": "A range"}
+
+    ax = acrux.bin.ipuz2ax.ipuz2ax(ipuz)
+    assert [c.text for c in ax.clues.values()].count("") == 2
+    for fmt in acrux.convert.FORMATS:
+        assert acrux.convert.convert(ax, fmt)
+
+
+def test_no_solution(tmpdir, capsys):
+    with open("%s/test/data/ipuz/zones.ipuz" % ROOT) as f:
+        ipuz = json.load(f)
+    del ipuz["solution"]
+    with pytest.raises(ValueError):
+        acrux.bin.ipuz2ax.to_pod(ipuz)
+
+    path = tmpdir.join("nosol.ipuz")
+    path.write(json.dumps(ipuz))
+    with pytest.raises(SystemExit) as e:
+        acrux.bin.ipuz2ax.main(["ipuz2ax", str(path)])
+    assert e.value.code == 1
+    assert capsys.readouterr().out == "%s: ipuz has no solution\n" % path
+
+
+def test_to_markup():
+    to_markup = acrux.bin.ipuz2ax.to_markup
+    assert to_markup("<i>____ War</i>") == "*____ War*"
+    assert to_markup("A <i>b </i>c") == "A *b* c"
+    assert to_markup("&lt;$5 &amp; 2*3&gt;") == "<$$5 & 2\\*3>"
+    assert to_markup("<b>Bold</b>") == "Bold"
+
+
+def pytest_generate_tests(metafunc):
+    if "case" in metafunc.fixturenames:
+        metafunc.parametrize("case", CASES)
@@ -16,6 +16,7 @@
 # limitations under the License.
 
 from .context import acrux
+import acrux.text
 
 
 def test_simple():
@@ -67,3 +68,10 @@ def test_accented():
     assert acrux.text.to_latin1("l\u01da") == "lü"
     assert acrux.text.to_latin1("l\xfc\u030c") == "lü"
     assert acrux.text.to_latin1("lu\u0308\u030c") == "lü"
+
+
+def test_long():
+    assert acrux.text.to_latin1("“é” " * 10000) == "\"é\" " * 10000
+    assert acrux.text.to_latin1("⅓" * 10000) == " ".join(["1/3"] * 10000)
+    assert acrux.text.to_latin1("ǐ́" * 10000) == "í" * 10000
+    assert acrux.text.to_latin1("⌘" * 10000) == "Cmd-" + "cmd-" * 9998 + "cmd"
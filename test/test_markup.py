@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from .context import acrux
+import acrux.markup
+
+Ref = acrux.markup.Ref
+Italic = acrux.markup.Italic
+
+
+def test_parse():
+    assert acrux.markup.parse("") == ()
+    assert acrux.markup.parse("Plain <text>") == ("Plain <text>", )
+    assert acrux.markup.parse("See $DEAF") == ("See ", Ref(("DEAF", ), None))
+    assert acrux.markup.parse("$TWICE[1] $$5 \\*") == (Ref(("TWICE[1]", ), None), " $5 *")
+    assert acrux.markup.parse("With ${DUMB&BLIND}") == ("With ", Ref(("DUMB", "BLIND"), "and"))
+    assert acrux.markup.parse("${A | B | C}") == (Ref(("A", "B", "C"), "or"), )
+    assert acrux.markup.parse("*Angela’s _____*") == (Italic(("Angela’s _____", )), )
+    assert acrux.markup.parse("*$B War* & *C*") == (
+        Italic((Ref(("B", ), None), " War")), " & ", Italic(("C", )))
+    assert acrux.markup.parse("* not italic *") == ("* not italic *", )
+
+
+def test_unknown_reference():
+    with pytest.raises(acrux.UnknownReferenceError) as e:
+        acrux.load({"grid": "AB\nCD\n", "clues": {"AB": "See $XY"}})
+    assert str(e.value) == "clue for AB refers to unknown entry $XY"
+    with pytest.raises(KeyError):
+        acrux.load({"grid": "AB\nCD\n", "clues": {"AC": "See ${AB & XY}"}})
+
+
+def test_rich():
+    ax = acrux.load({
+        "grid": "AB\nCD\n",
+        "clues": {
+            "AB": "*Café* & $CD",
+            "CD": "Not ${AB|AC}",
+        },
+    })
+    ab = ax.clues["AB", 0]
+    assert ab.rich == (Italic(("Café", )), " & ", acrux.markup.Name(Ref(("CD", ), None),
+                                                                     "3-across"))
+    assert ab.text == acrux.markup.to_html(ab.rich) == "<i>Café</i> &amp; 3-across"
+    assert acrux.markup.to_plain(ab.rich) == "Café & 3-across"
+    assert acrux.markup.to_latin1(ab.rich) == "Café & 3-across"
+    assert acrux.markup.to_reportlab(ab.rich) == "<i>Café</i> &amp; 3-across"
+    assert acrux.markup.to_plain(ax.clues["CD", 0].rich) == "Not 1-across or 1-down"
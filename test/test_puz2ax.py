@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import os
+import procyon
+import pytest
+import struct
+import sys
+from io import BytesIO, StringIO
+from .context import acrux
+import acrux.bin.ax2puz
+import acrux.bin.puz2ax
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+PUZ = [os.path.basename(p) for p in glob.glob("%s/test/data/puz/*" % ROOT)]
+CASES = [os.path.splitext(puz)[0] for puz in PUZ]
+
+
+def test_puz2ax(case):
+    with open("%s/test/data/puz/%s.puz" % (ROOT, case), "rb") as f:
+        source = f.read()
+
+    sys.stdin = StringIO()
+    sys.stdin.buffer = BytesIO(source)
+    sys.stdout = StringIO()
+    acrux.bin.puz2ax.main(["puz2ax"])
+    actual = sys.stdout.getvalue()
+    sys.stdin = sys.__stdin__
+    sys.stdout = sys.__stdout__
+
+    pod = procyon.load(StringIO(actual))
+    assert acrux.bin.ax2puz.dumps_puz(acrux.load(pod)) == source
+
+
+def test_checksum():
+    with open("%s/test/data/puz/heart.puz" % ROOT, "rb") as f:
+        source = bytearray(f.read())
+    source[0x40] ^= 1
+    with pytest.raises(acrux.bin.ax2puz.PuzError):
+        acrux.bin.ax2puz.loads_puz(bytes(source))
+    with pytest.raises(acrux.bin.ax2puz.PuzError):
+        acrux.bin.ax2puz.loads_puz(b"not a puzzle")
+
+
+def test_scrambled():
+    with open("%s/test/data/puz/zones.puz" % ROOT, "rb") as f:
+        source = bytearray(f.read())
+    expected = acrux.bin.ax2puz.loads_puz(bytes(source))
+
+    # The scrambled checksum alone doesn't make a file scrambled.
+    struct.pack_into("<H", source, 0x1E, 0x1234)
+    assert acrux.bin.ax2puz.loads_puz(bytes(source)) == expected
+
+    # The tag does, once the CIB checksum covers it.
+    width, height, clue_count, puzzle_type = struct.unpack_from("<BBHH", source, 0x2C)
+    struct.pack_into("<H", source, 0x32, 4)
+    cib = acrux.bin.ax2puz.cksum(struct.pack("<BBHHH", width, height, clue_count, puzzle_type, 4))
+    struct.pack_into("<H", source, 0x0E, cib)
+    with pytest.raises(acrux.bin.ax2puz.PuzError) as e:
+        acrux.bin.ax2puz.loads_puz(bytes(source))
+    assert str(e.value) == "solution is scrambled"
+
+
+def pytest_generate_tests(metafunc):
+    if "case" in metafunc.fixturenames:
+        metafunc.parametrize("case", CASES)
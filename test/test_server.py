@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import contextlib
+import http.client
+import json
+import os
+import procyon
+import socket
+import threading
+from .context import acrux
+import acrux.server
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+
+
+@contextlib.contextmanager
+def serving():
+    # Runs a Server on its own event loop, in a thread, for the duration of the block.
+    server = acrux.server.Server(jobs=1)
+    loop = asyncio.new_event_loop()
+    listener = loop.run_until_complete(server.start("127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    try:
+        yield server, listener.sockets[0].getsockname()[:2]
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        listener.close()
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            loop.run_until_complete(asyncio.wait(tasks))
+        loop.close()
+        server.close()
+
+
+def test_serve():
+    with serving() as (server, address):
+        conn = http.client.HTTPConnection(*address)
+
+        with open("%s/test/data/acrux/heart.pn" % ROOT, "rb") as f:
+            source = f.read()
+        with open("%s/test/data/ipuz/heart.ipuz" % ROOT, "rb") as f:
+            expected = f.read()
+        for _ in range(2):
+            conn.request("POST", "/convert/ipuz", source)
+            response = conn.getresponse()
+            assert response.status == 200
+            assert response.read() == expected
+        assert len(server.results) == 1
+
+        with open("%s/test/data/acrux/heart.pn" % ROOT) as f:
+            pod = procyon.load(f)
+        conn.request(
+            "POST", "/convert/pdf", json.dumps(pod), headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        assert response.status == 200
+        assert response.getheader("Content-Type") == "application/pdf"
+        assert response.read().startswith(b"%PDF")
+
+        conn.request("POST", "/convert/puz", b"grid: \"#\"\nclues:\n\tNOPE: \"Not in grid\"\n")
+        response = conn.getresponse()
+        assert response.status == 400
+        assert "KeyError" in json.loads(response.read().decode("utf-8"))["error"]
+
+        conn.request("POST", "/convert/gif", source)
+        response = conn.getresponse()
+        assert response.status == 404
+        response.read()
+        conn.close()
+
+
+def test_limits():
+    with serving() as (server, address):
+        requests = [
+            (400, b"POST /convert/" + b"x" * 70000 + b" HTTP/1.1\r\n\r\n"),
+            (431, b"POST /convert/puz HTTP/1.1\r\nX-Long: " + b"x" * 70000 + b"\r\n\r\n"),
+            (431, b"POST /convert/puz HTTP/1.1\r\n" + b"X-Many: 1\r\n" * 200 + b"\r\n"),
+        ]
+        for status, request in requests:
+            with socket.create_connection(address) as sock:
+                sock.sendall(request)
+                response = sock.makefile("rb").readline()
+            assert response.split()[1] == str(status).encode()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Chris Pickel
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from .context import acrux
+import acrux.watch
+
+
+def test_poll(tmpdir):
+    tmpdir.join("old.pn").write("grid: \"A\"\n")
+    changes = acrux.watch.changes(str(tmpdir), poll=0.01)
+    tmpdir.join("new.pn").write("grid: \"B\"\n")
+    tmpdir.join("ignored.txt").write("")
+    assert next(changes) == [str(tmpdir.join("new.pn"))]
+
+    os.utime(str(tmpdir.join("old.pn")), ns=(0, 0))
+    assert next(changes) == [str(tmpdir.join("old.pn"))]
+
+
+def test_default(tmpdir):
+    changes = acrux.watch.changes(str(tmpdir))
+    tmpdir.join("ignored.txt").write("")
+    tmpdir.join("new.pn").write("grid: \"B\"\n")
+    assert next(changes) == [str(tmpdir.join("new.pn"))]